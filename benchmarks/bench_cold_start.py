@@ -0,0 +1,106 @@
+"""Cold-start import cost of each dashboard page, measured with -X importtime.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_cold_start --runs 5 --output cold_start.json
+
+Each scenario runs in a fresh interpreter, so nothing is shared between runs.
+"home" imports streamlit_app itself (bare mode renders the Home page); the
+other scenarios add the modules their page imports on first render.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "streamlit": ["streamlit"],
+    "home": ["streamlit_app"],
+    "global": ["streamlit_app", "plotly.express", "plotly.graph_objects", "data_access"],
+    "region": ["streamlit_app", "plotly.io", "plotly.graph_objects", "pycountry", "data_access", "wordclouds"],
+}
+
+
+def parse_importtime(stderr):
+    """(module, self_us, cumulative_us, depth) for each -X importtime line."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(fields[0]), int(fields[1]), depth))
+    return rows
+
+
+def run_once(modules):
+    code = "; ".join(f"import {m}" for m in modules)
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+    rows = parse_importtime(proc.stderr)
+    top_level = [r for r in rows if r[3] == 0]
+    return {
+        "ok": proc.returncode == 0,
+        "wall_seconds": wall,
+        "import_seconds": sum(r[2] for r in top_level) / 1e6,
+        "modules": len(rows),
+        "top_level": top_level,
+        "error": proc.stderr.strip().splitlines()[-1] if proc.returncode else None,
+    }
+
+
+def run(scenarios, runs, top):
+    results = []
+    for name in scenarios:
+        samples = [run_once(SCENARIOS[name]) for _ in range(runs)]
+        ok = [s for s in samples if s["ok"]]
+        if not ok:
+            print(f"{name:>10}: ❌ failed: {samples[0]['error']}")
+            results.append({"scenario": name, "ok": False, "error": samples[0]["error"]})
+            continue
+        slowest = sorted(ok[-1]["top_level"], key=lambda r: -r[2])[:top]
+        result = {
+            "scenario": name,
+            "ok": True,
+            "runs": len(ok),
+            "wall_seconds_median": round(statistics.median(s["wall_seconds"] for s in ok), 4),
+            "import_seconds_median": round(statistics.median(s["import_seconds"] for s in ok), 4),
+            "modules_imported": ok[-1]["modules"],
+            "slowest_top_level": [{"module": r[0], "cumulative_ms": round(r[2] / 1000, 2)} for r in slowest],
+        }
+        results.append(result)
+        print(
+            f"{name:>10}: {result['import_seconds_median']:.3f}s imports, "
+            f"{result['wall_seconds_median']:.3f}s wall, {result['modules_imported']} modules"
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--top", type=int, default=10, help="slowest top-level imports to report")
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    args = parser.parse_args()
+
+    results = run(args.scenarios, args.runs, args.top)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"benchmark": "cold_start", "python": sys.version.split()[0], "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
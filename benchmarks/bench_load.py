@@ -0,0 +1,110 @@
+"""Rows/sec of DataFrame.to_sql against the COPY loader in bulkload.py.
+
+Run from the repository root against a scratch database:
+
+    python -m benchmarks.bench_load --rows 200000
+
+Connection settings come from the same DB_* variables as load.py. Each
+method loads into its own throwaway table, which is dropped afterwards.
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+from bulkload import copy_into
+
+DB_USER = os.getenv("DB_USER")
+DB_PASS = os.getenv("DB_PASS")
+DB_HOST = os.getenv("DB_HOST", "localhost")
+DB_PORT = os.getenv("DB_PORT", "5432")
+DB_NAME = os.getenv("DB_NAME", "trends_db")
+
+TABLE_DDL = """
+    CREATE TABLE {table} (
+        trend_id SERIAL,
+        region_name TEXT,
+        country_code TEXT,
+        term TEXT,
+        week DATE,
+        score DOUBLE PRECISION,
+        refresh_date DATE,
+        rank INTEGER
+    )
+"""
+
+
+def trends_frame(rows, seed=0):
+    """Random rows shaped like load.py's trends table."""
+    rng = np.random.default_rng(seed)
+    weeks = pd.date_range("2020-03-15", periods=260, freq="W")
+    return pd.DataFrame({
+        "term": rng.integers(0, 5000, rows).astype(str),
+        "region_name": rng.integers(0, 800, rows).astype(str),
+        "country_code": rng.choice(["DE", "FR", "BR", "JP", "IN", "GB"], rows),
+        "week": rng.choice(weeks, rows),
+        "score": rng.integers(0, 101, rows).astype(float),
+        "refresh_date": pd.Timestamp("2025-03-30"),
+        "rank": rng.integers(1, 26, rows),
+    })
+
+
+def _to_sql(engine, table, frame):
+    frame.to_sql(table, engine, index=False, if_exists="append")
+
+
+def _to_sql_multi(engine, table, frame):
+    frame.to_sql(table, engine, index=False, if_exists="append", method="multi", chunksize=1000)
+
+
+def _copy(engine, table, frame):
+    copy_into(engine, table, frame)
+
+
+METHODS = {"to_sql": _to_sql, "to_sql_multi": _to_sql_multi, "copy": _copy}
+
+
+def run(engine, rows, methods):
+    frame = trends_frame(rows)
+    results = []
+    for name in methods:
+        table = f"bench_load_{name}"
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+            conn.execute(text(TABLE_DDL.format(table=table)))
+        start = time.perf_counter()
+        METHODS[name](engine, table, frame)
+        elapsed = time.perf_counter() - start
+        with engine.begin() as conn:
+            loaded = conn.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+            conn.execute(text(f"DROP TABLE {table}"))
+        results.append({
+            "method": name,
+            "rows": loaded,
+            "seconds": round(elapsed, 3),
+            "rows_per_sec": round(loaded / elapsed, 1) if elapsed else None,
+        })
+        print(f"{name:>13}: {loaded} rows in {elapsed:.2f}s ({loaded / elapsed:,.0f} rows/s)")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--methods", nargs="+", default=list(METHODS), choices=list(METHODS))
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    args = parser.parse_args()
+
+    engine = create_engine(f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}")
+    results = run(engine, args.rows, args.methods)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"benchmark": "load", "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
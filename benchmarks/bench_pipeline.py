@@ -0,0 +1,244 @@
+"""Stage timings of the ETL and dashboard queries on synthetic data.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_pipeline --rows 1000000 --output baseline.json
+    python -m benchmarks.bench_pipeline --rows 1000000 --compare baseline.json
+
+The transform and fuzzy stages need no database. The load and query stages
+write into the database named by the DB_* variables, dropping and
+recreating its trends tables, so point them at a scratch database. Rows
+are generated and cleaned CHUNK rows at a time, so --rows can go up to
+100M; loads above one chunk take the stream (upsert) path, like
+LOAD_MODE=stream.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+# A match cache of the benchmark's own, emptied before the cold fuzzy run;
+# matcher reads this at import.
+BENCH_MATCH_CACHE = os.path.join(tempfile.mkdtemp(), "region_match_cache.json")
+os.environ["MATCH_CACHE_PATH"] = BENCH_MATCH_CACHE
+
+import pandas as pd
+
+from benchmarks.synthetic import raw_chunks
+from metrics import pipeline_metrics
+from transform import validate_dates, clean_region_names, apply_manual_fixes, perform_fuzzy_matching, clean_data
+
+STAGES = ["transform", "fuzzy", "load", "query"]
+DEFAULT_STAGES = ["transform", "fuzzy"]
+
+
+class Timings:
+    """Accumulated seconds and rows per named step."""
+
+    def __init__(self):
+        self.steps = {}
+
+    def time(self, name, func, *args, rows=None):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        step = self.steps.setdefault(name, {"seconds": 0.0, "rows": 0, "calls": 0})
+        step["seconds"] += elapsed
+        step["rows"] += rows if rows is not None else (len(result) if hasattr(result, "__len__") else 0)
+        step["calls"] += 1
+        return result
+
+    def report(self):
+        return {
+            name: {
+                "seconds": round(step["seconds"], 4),
+                "rows": step["rows"],
+                "rows_per_sec": round(step["rows"] / step["seconds"], 1) if step["seconds"] else None,
+                "calls": step["calls"],
+            }
+            for name, step in self.steps.items()
+        }
+
+
+def cleaned_chunks(rows, chunk_rows, timings):
+    """clean_data's row-local stages, timed one by one over each generated chunk."""
+    for chunk in raw_chunks(rows, chunk_rows):
+        n = len(chunk)
+        chunk = timings.time("validate_dates", validate_dates, chunk, ["week", "refresh_date"], rows=n)
+        chunk = timings.time("clean_region_names", clean_region_names, chunk, rows=n)
+        chunk = timings.time("apply_manual_fixes", apply_manual_fixes, chunk, rows=n)
+        yield chunk
+
+
+def bench_transform(rows, chunk_rows, workers=1):
+    """transform.clean_data timed end to end, with its stages from the run metrics.
+
+    The end-to-end figure includes the glue between stages and, with
+    workers > 1, the process pool's startup; data generation is excluded.
+    """
+    timings = Timings()
+    pairs = []
+    pipeline_metrics.start("bench_transform")
+    for chunk in raw_chunks(rows, chunk_rows):
+        chunk = timings.time("clean_data", clean_data, chunk, workers)
+        pairs.append(chunk[["country_name", "region_name_final"]].drop_duplicates())
+    # Stage seconds are summed over calls, so with workers > 1 they add up
+    # the time spent in every worker.
+    for stage in pipeline_metrics.summary():
+        timings.steps[stage["stage"]] = {
+            "seconds": stage["wall_seconds"], "rows": stage["rows_in"] or 0, "calls": stage["calls"],
+        }
+    return timings, pd.concat(pairs).drop_duplicates()
+
+
+def bench_fuzzy(pairs):
+    timings = Timings()
+    # clean_data already matched these regions; start the cold run from scratch.
+    if os.path.exists(BENCH_MATCH_CACHE):
+        os.remove(BENCH_MATCH_CACHE)
+    timings.time("fuzzy_cold", perform_fuzzy_matching, pairs, rows=len(pairs))
+    timings.time("fuzzy_cached", perform_fuzzy_matching, pairs, rows=len(pairs))
+    return timings
+
+
+def bench_load(rows, chunk_rows):
+    import load
+    from sqlalchemy import create_engine
+
+    engine = create_engine(
+        f"postgresql+psycopg2://{load.DB_USER}:{load.DB_PASS}@{load.DB_HOST}:{load.DB_PORT}/{load.TARGET_DB}"
+    )
+    timings = Timings()
+    timings.time("recreate_tables", load.recreate_tables, engine, rows=0)
+    dictionaries = load.new_dictionaries()
+    single = rows <= chunk_rows
+    if not single:
+        with engine.begin() as conn:
+            load.add_constraints(conn)
+    for chunk in cleaned_chunks(rows, chunk_rows, Timings()):
+        # Synthetic terms group to themselves; term_groups.csv is left alone.
+        terms = chunk["translate"].drop_duplicates()
+        chunk = load.merge_term_groups(chunk, pd.DataFrame({"translate": terms, "normalized_term": terms}))
+        frames = timings.time("normalized_frames", load.normalized_frames, chunk, dictionaries, rows=len(chunk))
+        if single:
+            with engine.begin() as conn:
+                load.ensure_partitions(conn, chunk["week"])
+            timings.time("copy_normalized", load.copy_normalized, engine, *frames, rows=len(chunk))
+        else:
+            timings.time("upsert_normalized", load.upsert_normalized, engine, *frames, rows=len(chunk))
+    timings.time("build_indexes", load.build_indexes, engine, rows=rows)
+    timings.time("refresh_rollups", load.refresh_rollups, engine, rows=rows)
+    timings.time("refresh_crosswalk", load.refresh_crosswalk, engine, rows=0)
+    return timings, ("full" if single else "stream")
+
+
+def bench_query(repeat):
+    """Uncached latency of the dashboard's queries, bypassing every cache tier."""
+    import data_access as da
+
+    countries = da._read_sql("countries", "SELECT country_id FROM countries ORDER BY country_id")
+    samples = {"country_data": [], "country_weeks": [], "top_rank1_terms": []}
+    columns = ("region_name_final", "geo_name", "term", "translate", "week", "rank")
+    for _ in range(repeat):
+        for country_id in countries["country_id"].tolist():
+            start = time.perf_counter()
+            weeks = da._read_sql(
+                "country_weeks",
+                "SELECT DISTINCT week FROM rollup_term_weeks WHERE country_id = :c ORDER BY week",
+                {"c": country_id},
+            )["week"].tolist()
+            samples["country_weeks"].append(time.perf_counter() - start)
+            if not weeks:
+                continue
+            params = {"country_id": country_id, "first_week": weeks[0], "last_week": weeks[-1], "weeks": weeks}
+            start = time.perf_counter()
+            da._read_sql("country_data", da.trends_query(columns), params)
+            samples["country_data"].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        da._read_sql("top_rank1_terms", "SELECT country_name, top_terms, count FROM country_top_rank1_terms")
+        samples["top_rank1_terms"].append(time.perf_counter() - start)
+    return {
+        name: {
+            "samples": len(values),
+            "p50_ms": round(statistics.median(values) * 1000, 2),
+            "p95_ms": round(sorted(values)[int(0.95 * (len(values) - 1))] * 1000, 2),
+        }
+        for name, values in samples.items() if values
+    }
+
+
+def compare(results, baseline_path, tolerance):
+    """Print steps that got slower than the baseline by more than `tolerance`; returns how many."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = 0
+    for stage, steps in results["stages"].items():
+        for name, step in steps.items():
+            before = baseline.get("stages", {}).get(stage, {}).get(name)
+            if not before:
+                continue
+            key = "seconds" if "seconds" in step else "p50_ms"
+            if not before.get(key) or step.get(key) is None:
+                continue
+            ratio = step[key] / before[key]
+            flag = "❌" if ratio > 1 + tolerance else "✅"
+            regressions += ratio > 1 + tolerance
+            print(f"{flag} {stage}.{name}: {before[key]} -> {step[key]} ({ratio:.2f}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--chunk-rows", type=int, default=1_000_000)
+    parser.add_argument("--stages", nargs="+", default=DEFAULT_STAGES, choices=STAGES)
+    parser.add_argument("--query-repeat", type=int, default=3)
+    parser.add_argument("--transform-workers", type=int, default=1,
+                        help="run clean_data's per-country process pool with this many workers")
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before flagging")
+    args = parser.parse_args()
+
+    results = {
+        "benchmark": "pipeline",
+        "rows": args.rows,
+        "chunk_rows": args.chunk_rows,
+        "python": sys.version.split()[0],
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "transform_workers": args.transform_workers,
+        "stages": {},
+    }
+    pairs = None
+    if "transform" in args.stages or "fuzzy" in args.stages:
+        timings, pairs = bench_transform(args.rows, args.chunk_rows, args.transform_workers)
+        results["stages"]["transform"] = timings.report()
+    if "fuzzy" in args.stages:
+        results["stages"]["fuzzy"] = bench_fuzzy(pairs).report()
+    if "load" in args.stages:
+        timings, mode = bench_load(args.rows, args.chunk_rows)
+        results["stages"]["load"] = timings.report()
+        results["load_mode"] = mode
+    if "query" in args.stages:
+        results["stages"]["query"] = bench_query(args.query_repeat)
+
+    for stage, steps in results["stages"].items():
+        for name, step in steps.items():
+            summary = f"{step['seconds']:.3f}s" if "seconds" in step else f"p50 {step['p50_ms']} ms"
+            print(f"{stage:>9}.{name:<20} {summary}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        sys.exit(1 if compare(results, args.compare, args.tolerance) else 0)
+
+
+if __name__ == "__main__":
+    main()
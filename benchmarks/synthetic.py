@@ -0,0 +1,116 @@
+"""Synthetic raw Google Trends data at any scale, in the raw CSV's schema.
+
+Stream a file to disk (constant memory, so 100M rows is fine):
+
+    python -m benchmarks.synthetic --rows 100000000 --output synthetic_raw.csv
+
+Countries and region names come from the GADM region index, decorated with
+the admin words and spellings transform.py cleans up; each (week, region)
+gets the top-25 ranked terms like the real dataset.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from transform import ISO3_MAPPING, COUNTRY_REFERENCE
+from geodata import country_regions
+
+RAW_COLUMNS = [
+    "term", "translate", "country_name", "country_code", "region_name",
+    "week", "score", "rank", "refresh_date",
+]
+FIRST_WEEK = "2020-03-15"
+RANKS = 25
+# Decorations transform.clean_region_names has to strip again.
+REGION_DECORATIONS = ["{}", "{}", "{}", "{} Province", "State of {}", "{} Region", "{} District"]
+
+
+def region_catalog(seed=0):
+    """(country_name, country_code, region_name) for every country with GADM regions."""
+    rng = np.random.default_rng(seed)
+    iso2 = dict(zip(COUNTRY_REFERENCE["country_name"], COUNTRY_REFERENCE["country_code"]))
+    rows = []
+    for country, iso3 in sorted(ISO3_MAPPING.items()):
+        regions = country_regions(iso3)
+        if not regions or country not in iso2:
+            continue
+        code = iso2[country]
+        for region in regions:
+            decoration = REGION_DECORATIONS[rng.integers(len(REGION_DECORATIONS))]
+            rows.append((country, code, decoration.format(region["name"])))
+    return pd.DataFrame(rows, columns=["country_name", "country_code", "region_name"])
+
+
+def vocabulary(size, seed=0):
+    """`size` distinct terms with English translations, some sharing a stem."""
+    rng = np.random.default_rng(seed)
+    stems = [f"topic {i}" for i in range(max(1, size // 4))]
+    suffixes = ["", " live", " vs rivals", " 2025", " news"]
+    terms = [
+        f"{stems[rng.integers(len(stems))]}{suffixes[i % len(suffixes)]} #{i}"
+        for i in range(size)
+    ]
+    return np.array(terms, dtype=object), np.array([t.replace("#", "no.") for t in terms], dtype=object)
+
+
+def raw_chunks(rows, chunk_rows=1_000_000, vocabulary_size=None, seed=0):
+    """Yield raw-schema DataFrames totalling `rows` rows.
+
+    Rows are laid out week by week and region by region, RANKS rows per
+    (week, region), so any prefix looks like a shorter time window.
+    """
+    catalog = region_catalog(seed)
+    terms, translations = vocabulary(vocabulary_size or max(1000, rows // 200), seed)
+    weeks = pd.Timestamp(FIRST_WEEK)
+    refresh = pd.Timestamp(FIRST_WEEK) + pd.Timedelta(weeks=max(1, rows // (len(catalog) * RANKS)) + 1)
+    rng = np.random.default_rng(seed)
+
+    for start in range(0, rows, chunk_rows):
+        index = np.arange(start, min(rows, start + chunk_rows))
+        slot = index // RANKS
+        region = slot % len(catalog)
+        week = slot // len(catalog)
+        term = rng.zipf(1.3, len(index)) % len(terms)
+        places = catalog.iloc[region]
+        yield pd.DataFrame({
+            "term": terms[term],
+            "translate": translations[term],
+            "country_name": places["country_name"].to_numpy(),
+            "country_code": places["country_code"].to_numpy(),
+            "region_name": places["region_name"].to_numpy(),
+            "week": (weeks + pd.to_timedelta(week * 7, unit="D")).strftime("%Y-%m-%d"),
+            "score": rng.integers(0, 101, len(index)).astype(float),
+            "rank": index % RANKS + 1,
+            "refresh_date": refresh.strftime("%Y-%m-%d"),
+        }, columns=RAW_COLUMNS)
+
+
+def raw_frame(rows, **kwargs):
+    return pd.concat(raw_chunks(rows, **kwargs), ignore_index=True)
+
+
+def write_raw_csv(path, rows, chunk_rows=1_000_000, seed=0):
+    written = 0
+    for i, chunk in enumerate(raw_chunks(rows, chunk_rows, seed=seed)):
+        chunk.to_csv(path, mode="w" if i == 0 else "a", header=(i == 0), index=False)
+        written += len(chunk)
+        print(f"ℹ️ {written:,} / {rows:,} rows written", file=sys.stderr)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--chunk-rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="synthetic_raw.csv")
+    args = parser.parse_args()
+    write_raw_csv(args.output, args.rows, args.chunk_rows, args.seed)
+    print(f"✅ {args.rows:,} synthetic rows written to '{os.path.abspath(args.output)}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from metrics import pipeline_metrics
+
+# === CONFIG ===
+COPY_BATCH_ROWS = int(os.getenv("COPY_BATCH_ROWS", "50000"))
+COPY_WORKERS    = int(os.getenv("COPY_WORKERS", "4"))
+
+NULL_MARKER = r"\N"
+
+
+class FrameReader(io.TextIOBase):
+    """File-like CSV view of a DataFrame for COPY FROM STDIN.
+
+    Rows are rendered COPY_BATCH_ROWS at a time as psycopg2 reads, so only
+    one batch of text is ever held in memory and nothing touches disk.
+    """
+
+    def __init__(self, frame, batch_rows=COPY_BATCH_ROWS):
+        self.frame = frame
+        self.batch_rows = batch_rows
+        self.offset = 0
+        self.batch = io.StringIO()
+
+    def readable(self):
+        return True
+
+    def _next_batch(self):
+        rows = self.frame.iloc[self.offset:self.offset + self.batch_rows]
+        self.offset += self.batch_rows
+        self.batch = io.StringIO(rows.to_csv(index=False, header=False, na_rep=NULL_MARKER))
+
+    def read(self, size=-1):
+        parts = []
+        while size != 0:
+            data = self.batch.read(size)
+            if data:
+                parts.append(data)
+                if size > 0:
+                    size -= len(data)
+            elif self.offset < len(self.frame):
+                self._next_batch()
+            else:
+                break
+        return "".join(parts)
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+
+def copy_frame(dbapi_conn, table, frame, columns=None):
+    """COPY `frame` into `table` over an open DB-API (psycopg2) connection."""
+    columns = list(columns or frame.columns)
+    sql = (
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN "
+        f"WITH (FORMAT csv, NULL '{NULL_MARKER}')"
+    )
+    with dbapi_conn.cursor() as cur:
+        cur.copy_expert(sql, FrameReader(frame[columns]))
+    return len(frame)
+
+
+def copy_into(engine, table, frame, columns=None):
+    """COPY `frame` into `table` on a pooled connection of its own and commit."""
+    with pipeline_metrics.stage(f"load_{table}", len(frame)) as stage:
+        raw = engine.raw_connection()
+        try:
+            rows = copy_frame(raw, table, frame, columns)
+            raw.commit()
+            stage.rows_out = rows
+            return rows
+        finally:
+            raw.close()
+
+
+def copy_many(engine, frames, workers=COPY_WORKERS):
+    """COPY several independent tables at once, one connection per table.
+
+    `frames` maps table name -> DataFrame. Callers must only combine tables
+    whose constraints are not checked yet (or do not depend on each other).
+    """
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(frames)))) as pool:
+        futures = {table: pool.submit(copy_into, engine, table, frame) for table, frame in frames.items()}
+        return {table: future.result() for table, future in futures.items()}
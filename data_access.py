@@ -0,0 +1,405 @@
+import os
+import sys
+import time
+import threading
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+from shared_cache import shared_cache
+from profiling import profiler, percentile, result_size
+
+# === CONFIG ===
+DB_USER = os.getenv("DB_USER")
+DB_PASS = os.getenv("DB_PASS")
+DB_HOST = os.getenv("DB_HOST")
+DB_PORT = os.getenv("DB_PORT")
+DB_NAME = os.getenv("DB_NAME")
+FRAME_CACHE_MB = int(os.getenv("FRAME_CACHE_MB", "256"))
+
+DB_POOL_SIZE         = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW      = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+DB_POOL_TIMEOUT      = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE      = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+STATEMENT_TIMEOUT_MS = int(os.getenv("STATEMENT_TIMEOUT_MS", "15000"))
+QUERY_WORKERS        = int(os.getenv("QUERY_WORKERS", "4"))
+QUERY_METRICS_WINDOW = int(os.getenv("QUERY_METRICS_WINDOW", "500"))
+DATA_VERSION_TTL     = float(os.getenv("DATA_VERSION_TTL", "60"))
+
+# Bounded pool shared by every session: connections are health-checked on
+# checkout, recycled periodically, and each statement is cancelled by the
+# server after STATEMENT_TIMEOUT_MS.
+engine = create_engine(
+    f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}",
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+    connect_args={"options": f"-c statement_timeout={STATEMENT_TIMEOUT_MS}"},
+)
+query_pool = ThreadPoolExecutor(max_workers=QUERY_WORKERS, thread_name_prefix="query")
+
+# Selectable columns of the trends slice and the dimension each one needs.
+TREND_COLUMNS = {
+    "region_name":       ("r.region_name", "regions"),
+    "region_name_final": ("r.region_name_final", "regions"),
+    "term":              ("t.term", "terms"),
+    "translate":         ("t.translate", "terms"),
+    "final_term":        ("t.final_term", "terms"),
+    "week":              ("tr.week", None),
+    "rank":              ("tr.rank", None),
+    "score":             ("tr.score", None),
+    "geo_name":          ("x.geo_name", "region_crosswalk"),
+}
+JOINS = {
+    "regions":          "JOIN regions r ON tr.region_id = r.region_id",
+    "terms":            "JOIN terms t ON tr.term_id = t.term_id",
+    "region_crosswalk": "LEFT JOIN region_crosswalk x ON tr.region_id = x.region_id",
+}
+
+
+# === MEMORY ===
+def frame_bytes(value):
+    """Deep in-memory size of a cached value."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(sys.getsizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def rss_bytes():
+    """Current resident set size of this process, or its peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+# === FRAME CACHE ===
+class FrameCache:
+    """Process-wide LRU of query results, bounded by their in-memory size.
+
+    Every dashboard session shares the same objects, so cached frames must
+    be treated as read-only by callers. Misses go to the cross-replica
+    `shared` cache before the database; keys are suffixed with `version()`
+    so a new ETL load invalidates both tiers.
+    """
+
+    def __init__(self, max_bytes=FRAME_CACHE_MB * 1024 * 1024, shared=None, version=None):
+        self.max_bytes = max_bytes
+        self.shared = shared
+        self.version = version
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, loader):
+        start = time.perf_counter()
+        name = key[0]
+        if self.version is not None:
+            key = (*key, self.version())
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if entry is not None:
+            value, size = entry
+            profiler.record(name, "query", time.perf_counter() - start, "hit", result_size(value)[0], size)
+            return value
+
+        loaded = []
+        def load():
+            loaded.append(True)
+            return loader()
+        value = self.shared.get_frame(key, load) if self.shared is not None else load()
+        size = frame_bytes(value)
+        # "shared" when another replica (or thread) already had the result.
+        profiler.record(name, "query", time.perf_counter() - start, "miss" if loaded else "shared",
+                        result_size(value)[0], size)
+        with self.lock:
+            if key not in self.entries:
+                self.entries[key] = (value, size)
+                self.bytes += size
+            while self.bytes > self.max_bytes and len(self.entries) > 1:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.bytes -= evicted
+        print(f"ℹ️ Cached {key[0]} ({size / 1e6:.2f} MB); {memory_report_line()}")
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "frame_bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+frame_cache = FrameCache(shared=shared_cache, version=lambda: get_data_version())
+
+
+def memory_report():
+    """Frame cache totals plus the resident memory of this replica."""
+    return {**frame_cache.stats(), "rss_bytes": rss_bytes(), "shared_cache": shared_cache.stats()}
+
+
+def memory_report_line():
+    report = memory_report()
+    return (
+        f"frame cache {report['frame_bytes'] / 1e6:.1f} MB in {report['entries']} frames, "
+        f"RSS {report['rss_bytes'] / 1e6:.1f} MB"
+    )
+
+
+# === QUERY METRICS ===
+class QueryMetrics:
+    """Pool-wait and execution latency per query name over a sliding window."""
+
+    def __init__(self, window=QUERY_METRICS_WINDOW):
+        self.counts = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.waits = defaultdict(lambda: deque(maxlen=window))
+        self.latencies = defaultdict(lambda: deque(maxlen=window))
+        self.lock = threading.Lock()
+
+    def record(self, name, wait, latency, failed=False):
+        with self.lock:
+            self.counts[name] += 1
+            self.errors[name] += int(failed)
+            self.waits[name].append(wait)
+            self.latencies[name].append(latency)
+
+    def report(self):
+        with self.lock:
+            return {
+                name: {
+                    "count": self.counts[name],
+                    "errors": self.errors[name],
+                    "pool_wait_p50_ms": round(percentile(self.waits[name], 0.50) * 1000, 2),
+                    "pool_wait_p95_ms": round(percentile(self.waits[name], 0.95) * 1000, 2),
+                    "latency_p50_ms": round(percentile(self.latencies[name], 0.50) * 1000, 2),
+                    "latency_p95_ms": round(percentile(self.latencies[name], 0.95) * 1000, 2),
+                }
+                for name in self.counts
+            }
+
+
+query_metrics = QueryMetrics()
+
+
+def pool_report():
+    """Connection pool occupancy plus per-query latency and pool-wait percentiles."""
+    pool = engine.pool
+    return {
+        "pool_size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "queries": query_metrics.report(),
+    }
+
+
+def _read_sql(name, query, params=None):
+    """Run one query on a pooled connection, recording pool wait and latency."""
+    start = time.perf_counter()
+    acquired = None
+    try:
+        with engine.connect() as conn:
+            acquired = time.perf_counter()
+            frame = pd.read_sql(text(query), conn, params=params)
+    except Exception as e:
+        now = time.perf_counter()
+        wait = (acquired or now) - start
+        query_metrics.record(name, wait, now - (acquired or now), failed=True)
+        profiler.log(name=name, kind="sql", pool_wait_ms=round(wait * 1000, 2),
+                     ms=round((now - (acquired or now)) * 1000, 2), failed=True)
+        print(f"❌ Query '{name}' failed after {(now - start) * 1000:.0f} ms: {e}")
+        raise
+    latency = time.perf_counter() - acquired
+    query_metrics.record(name, acquired - start, latency)
+    profiler.log(name=name, kind="sql", pool_wait_ms=round((acquired - start) * 1000, 2),
+                 ms=round(latency * 1000, 2), rows=len(frame), failed=False)
+    return frame
+
+
+def fetch_concurrently(calls):
+    """Run independent loaders on the query pool.
+
+    `calls` maps a name to a zero-argument callable; the results come back
+    under the same names once all of them have finished.
+    """
+    futures = {name: query_pool.submit(call) for name, call in calls.items()}
+    return {name: future.result() for name, future in futures.items()}
+
+
+# === DATA VERSION ===
+_data_version = {"value": None, "checked": 0.0}
+
+
+def get_data_version():
+    """When the ETL last loaded trends, re-read at most every DATA_VERSION_TTL seconds.
+
+    Derived artifacts cached outside the frame cache (e.g. rendered word
+    clouds) include it in their keys so a new load invalidates them.
+    """
+    now = time.monotonic()
+    if _data_version["value"] is None or now - _data_version["checked"] > DATA_VERSION_TTL:
+        frame = _read_sql(
+            "data_version",
+            "SELECT loaded_at FROM etl_watermark WHERE table_name = 'trends'",
+        )
+        _data_version["value"] = str(frame["loaded_at"].iloc[0]) if not frame.empty else ""
+        _data_version["checked"] = now
+    return _data_version["value"]
+
+
+# === GLOBAL-LEVEL QUERIES ===
+def get_top_rank1_terms():
+    # Pre-aggregated by the ETL (see ROLLUP_SQL in load.py): one row per country.
+    return frame_cache.get(("top_rank1_terms",), lambda: _read_sql(
+        "top_rank1_terms",
+        "SELECT country_name, top_terms, count FROM country_top_rank1_terms"
+    ))
+
+
+def get_popular_terms():
+    frame = frame_cache.get(("popular_terms",), lambda: _read_sql(
+        "popular_terms",
+        "SELECT DISTINCT final_term FROM term_country_popularity "
+        "WHERE final_term IS NOT NULL ORDER BY final_term"
+    ))
+    return frame["final_term"].tolist()
+
+
+def get_term_popularity(final_term):
+    return frame_cache.get(("term_popularity", final_term), lambda: _read_sql(
+        "term_popularity",
+        "SELECT country_name, count FROM term_country_popularity "
+        "WHERE final_term = :term ORDER BY country_name",
+        {"term": final_term},
+    ))
+
+
+# === COUNTRY-LEVEL QUERIES ===
+def get_countries():
+    return frame_cache.get(("countries",), lambda: _read_sql("countries", """
+        SELECT c.country_id, c.country_code, c.country_name
+        FROM countries c
+        WHERE EXISTS (SELECT 1 FROM rollup_term_weeks w WHERE w.country_id = c.country_id)
+        ORDER BY c.country_name
+    """))
+
+
+def get_country_weeks(country_id):
+    frame = frame_cache.get(("country_weeks", country_id), lambda: _read_sql(
+        "country_weeks",
+        "SELECT DISTINCT week FROM rollup_term_weeks WHERE country_id = :country_id ORDER BY week",
+        {"country_id": country_id},
+    ))
+    return frame["week"].tolist()
+
+
+def trends_query(columns):
+    """SELECT for a country's rank 1-5 trends, joining only the dimensions `columns` need."""
+    unknown = set(columns) - set(TREND_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown trend columns: {sorted(unknown)}")
+    select = ",\n            ".join(f"{TREND_COLUMNS[c][0]} AS {c}" for c in columns)
+    joins = "\n        ".join(
+        JOINS[d] for d in JOINS if any(TREND_COLUMNS[c][1] == d for c in columns)
+    )
+    return f"""
+        SELECT
+            {select}
+        FROM trends tr
+        {joins}
+        WHERE tr.country_id = :country_id
+          AND tr.week BETWEEN :first_week AND :last_week
+          AND tr.week = ANY(:weeks)
+          AND tr.rank BETWEEN 1 AND 5
+    """
+
+
+def get_crosswalk(country_code):
+    """The ETL's region -> GeoJSON NAME_1 crosswalk rows for one country."""
+    return frame_cache.get(("crosswalk", country_code), lambda: _read_sql(
+        "crosswalk",
+        "SELECT x.region_name, r.region_name_final, x.geo_name, x.confidence, x.method "
+        "FROM region_crosswalk x JOIN regions r ON x.region_id = r.region_id "
+        "WHERE x.country_code = :code ORDER BY x.region_name",
+        {"code": country_code},
+    ))
+
+
+def get_region_metrics(country_id):
+    """Per map region (GeoJSON NAME_1) metrics over all of a country's rank 1-5 rows.
+
+    One grouped query returns (region, term) counts; the top term, rank 1
+    count and mean score per region are derived from it.
+    """
+    def load():
+        counts = _read_sql("region_metrics", """
+            SELECT x.geo_name, t.translate AS term,
+                   COUNT(*) AS appearances,
+                   COUNT(*) FILTER (WHERE tr.rank = 1) AS rank1_count,
+                   SUM(tr.score) AS score_sum,
+                   COUNT(tr.score) AS score_count
+            FROM trends tr
+            JOIN terms t ON tr.term_id = t.term_id
+            JOIN region_crosswalk x ON tr.region_id = x.region_id
+            WHERE tr.country_id = :country_id
+              AND tr.rank BETWEEN 1 AND 5
+              AND x.geo_name IS NOT NULL
+            GROUP BY x.geo_name, t.translate
+        """, {"country_id": country_id})
+        totals = counts.groupby("geo_name")[["appearances", "rank1_count", "score_sum", "score_count"]].sum()
+        top = (
+            counts.sort_values(["geo_name", "appearances", "term"], ascending=[True, False, True])
+            .drop_duplicates("geo_name")
+            .set_index("geo_name")["term"]
+        )
+        return pd.DataFrame({
+            "top_term": top,
+            "rank1_count": totals["rank1_count"],
+            "appearances": totals["appearances"],
+            "mean_score": totals["score_sum"] / totals["score_count"].where(totals["score_count"] > 0),
+        })
+    return frame_cache.get(("region_metrics", country_id), load)
+
+
+def get_country_data(country_id, weeks,
+                     columns=("region_name_final", "geo_name", "term", "translate", "week", "rank")):
+    """A country's rank 1-5 rows for `weeks`, with only the requested columns.
+
+    The week range bounds let Postgres prune the weekly partitions before
+    the ANY filter is applied.
+    """
+    weeks = tuple(sorted(weeks))
+    columns = tuple(columns)
+    if not weeks:
+        return pd.DataFrame(columns=list(columns))
+    params = {
+        "country_id": country_id,
+        "first_week": weeks[0],
+        "last_week": weeks[-1],
+        "weeks": list(weeks),
+    }
+    key = ("country_data", country_id, weeks, columns)
+    return frame_cache.get(key, lambda: _read_sql("country_data", trends_query(columns), params))
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+
+class DimensionDictionary:
+    """Hash map from a dimension's natural key to its integer surrogate id.
+
+    Keys are a single value for one-column keys and a tuple otherwise, with
+    missing values normalized to None. Unseen keys get the next free id, so
+    ids already stored in the database never change.
+    """
+
+    def __init__(self, ids=None):
+        self.ids = dict(ids or {})
+        self.next_id = max(self.ids.values(), default=0) + 1
+
+    def __len__(self):
+        return len(self.ids)
+
+    @staticmethod
+    def _key(row):
+        row = tuple(None if pd.isna(v) else v for v in row)
+        return row[0] if len(row) == 1 else row
+
+    def _id_for(self, key):
+        surrogate = self.ids.get(key)
+        if surrogate is None:
+            surrogate = self.ids[key] = self.next_id
+            self.next_id += 1
+        return surrogate
+
+    def encode(self, keys):
+        """Surrogate ids for `keys` (a Series, or a DataFrame of key columns).
+
+        Each distinct key is hashed once; rows get their id by integer
+        indexing into the per-key results.
+        """
+        frame = keys.to_frame() if isinstance(keys, pd.Series) else keys
+        frame = frame.astype(object)
+        codes = frame.groupby(list(frame.columns), dropna=False, sort=False).ngroup().to_numpy()
+        uniques = frame.drop_duplicates()
+        ids = np.array(
+            [self._id_for(self._key(row)) for row in uniques.itertuples(index=False, name=None)],
+            dtype=np.int64,
+        )
+        return pd.Series(ids[codes], index=keys.index)
+
+
+def load_dictionary(conn, table, key_cols, id_col):
+    """Read an existing dimension's natural key -> id mapping from the database."""
+    rows = conn.execute(text(f"SELECT {', '.join(key_cols)}, {id_col} FROM {table}"))
+    return DimensionDictionary({DimensionDictionary._key(row[:-1]): row[-1] for row in rows})
@@ -1,10 +1,26 @@
 import pandas as pd
+from metrics import pipeline_metrics
 
 def extract_data(filepath='actualDataTeamProject.csv'):
     print(f"Reading data from {filepath}...")
-    df = pd.read_csv(filepath)
+    with pipeline_metrics.stage("read") as stage:
+        df = pd.read_csv(filepath)
+        stage.rows_out = len(df)
     return df
 
+def extract_chunks(filepath='actualDataTeamProject.csv', chunksize=100_000):
+    """Yield the raw CSV as DataFrames of at most `chunksize` rows."""
+    print(f"Streaming data from {filepath} in chunks of {chunksize} rows...")
+    with pd.read_csv(filepath, chunksize=chunksize) as reader:
+        while True:
+            # Timed per chunk, so the read stage excludes the caller's work between chunks.
+            with pipeline_metrics.stage("read") as stage:
+                chunk = next(reader, None)
+                stage.rows_out = 0 if chunk is None else len(chunk)
+            if chunk is None:
+                return
+            yield chunk
+
 if __name__ == "__main__":
     df = extract_data()
     print(f"Extracted {len(df)} rows.")
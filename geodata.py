@@ -0,0 +1,260 @@
+import os
+import glob
+import json
+from functools import lru_cache
+
+# === CONFIG ===
+GEOJSON_DIR       = os.getenv("GEOJSON_DIR", "Country Regions")
+REGION_INDEX_PATH = os.getenv("REGION_INDEX_PATH", os.path.join(GEOJSON_DIR, "region_index.json"))
+SIMPLIFIED_DIR    = os.getenv("SIMPLIFIED_DIR", os.path.join(GEOJSON_DIR, "simplified"))
+MAP_PIXELS        = int(os.getenv("MAP_PIXELS", "600"))
+
+# Detail tiers, coarsest first: (Douglas-Peucker tolerance in degrees,
+# decimal places kept after quantization).
+DETAIL_TIERS = {
+    "low":    (0.05, 2),
+    "medium": (0.01, 3),
+    "high":   (0.002, 4),
+}
+
+
+def geojson_path(iso3):
+    return os.path.join(GEOJSON_DIR, f"gadm41_{iso3}_1.json")
+
+
+def geojson_files():
+    """ISO3 code -> path for every GADM level-1 file in GEOJSON_DIR."""
+    files = {}
+    for path in sorted(glob.glob(os.path.join(GEOJSON_DIR, "gadm41_*_1.json"))):
+        iso3 = os.path.basename(path).split("_")[1]
+        files[iso3] = path
+    return files
+
+
+def tier_path(iso3, tier):
+    return os.path.join(SIMPLIFIED_DIR, f"gadm41_{iso3}_1.{tier}.json")
+
+
+def load_geojson(iso3, tier=None):
+    """GADM FeatureCollection for a country, or None if there is no file.
+
+    With `tier` set, the simplified geometry of that detail tier is returned
+    instead of the full-resolution source, building it first if needed.
+    """
+    path = geojson_path(iso3)
+    if not os.path.exists(path):
+        return None
+    if tier is not None:
+        path = tier_path(iso3, tier)
+        if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(geojson_path(iso3)):
+            build_geometry_tiers(iso3)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def geometry_bbox(geometry):
+    """[min_lon, min_lat, max_lon, max_lat] of a Polygon or MultiPolygon."""
+    min_x = min_y = float("inf")
+    max_x = max_y = float("-inf")
+    stack = [geometry["coordinates"]]
+    while stack:
+        item = stack.pop()
+        if item and isinstance(item[0], (int, float)):
+            x, y = item[0], item[1]
+            min_x, max_x = min(min_x, x), max(max_x, x)
+            min_y, max_y = min(min_y, y), max(max_y, y)
+        else:
+            stack.extend(item)
+    return [min_x, min_y, max_x, max_y]
+
+
+def merge_bboxes(bboxes):
+    return [
+        min(b[0] for b in bboxes), min(b[1] for b in bboxes),
+        max(b[2] for b in bboxes), max(b[3] for b in bboxes),
+    ]
+
+
+# === REGION INDEX ===
+def build_region_index(path=REGION_INDEX_PATH):
+    """Extract region names, codes and bounding boxes from every GADM file.
+
+    The index is a single small JSON file keyed by ISO3; each country keeps
+    its regions in GeoJSON feature order plus the source file's mtime so
+    stale entries can be detected.
+    """
+    index = {}
+    for iso3, source in geojson_files().items():
+        with open(source, "r", encoding="utf-8") as f:
+            geojson_data = json.load(f)
+        regions = []
+        for feature in geojson_data["features"]:
+            props = feature["properties"]
+            regions.append({
+                "name": props["NAME_1"],
+                "gid": props.get("GID_1"),
+                "hasc": props.get("HASC_1"),
+                "iso": props.get("ISO_1"),
+                "bbox": geometry_bbox(feature["geometry"]),
+            })
+        index[iso3] = {
+            "mtime": os.path.getmtime(source),
+            "bbox": merge_bboxes([r["bbox"] for r in regions]) if regions else None,
+            "regions": regions,
+        }
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    print(f"✅ Region index for {len(index)} countries written to '{path}'.")
+    return index
+
+
+def _index_is_stale(index):
+    files = geojson_files()
+    if set(files) != set(index):
+        return True
+    return any(os.path.getmtime(path) > index[iso3]["mtime"] for iso3, path in files.items())
+
+
+@lru_cache(maxsize=1)
+def load_region_index(path=REGION_INDEX_PATH):
+    """The region index, rebuilt first if it is missing or older than any GADM file."""
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if not _index_is_stale(index):
+            return index
+    return build_region_index(path)
+
+
+def country_regions(iso3):
+    """Index entries for a country's regions, in GeoJSON feature order."""
+    entry = load_region_index().get(iso3)
+    return entry["regions"] if entry else []
+
+
+def region_names(iso3):
+    """Sorted NAME_1 values of a country's GADM regions, with spaces removed."""
+    return sorted(r["name"].replace(" ", "") for r in country_regions(iso3))
+
+
+# === SIMPLIFIED GEOMETRY TIERS ===
+def _point_segment_distance(p, a, b):
+    (px, py), (ax, ay), (bx, by) = p, a, b
+    dx, dy = bx - ax, by - ay
+    if dx == 0 and dy == 0:
+        return ((px - ax) ** 2 + (py - ay) ** 2) ** 0.5
+    t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / (dx * dx + dy * dy)))
+    cx, cy = ax + t * dx, ay + t * dy
+    return ((px - cx) ** 2 + (py - cy) ** 2) ** 0.5
+
+
+def simplify_line(points, tolerance):
+    """Douglas-Peucker simplification; iterative so long coastlines don't recurse."""
+    if len(points) < 3:
+        return list(points)
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        max_dist, index = 0.0, None
+        for i in range(start + 1, end):
+            dist = _point_segment_distance(points[i], points[start], points[end])
+            if dist > max_dist:
+                max_dist, index = dist, i
+        if index is not None and max_dist > tolerance:
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+    return [p for p, k in zip(points, keep) if k]
+
+
+def quantize_ring(ring, decimals):
+    out = []
+    for x, y, *_ in ring:
+        point = [round(x, decimals), round(y, decimals)]
+        if not out or out[-1] != point:
+            out.append(point)
+    return out
+
+
+def simplify_ring(ring, tolerance, decimals):
+    """Simplified, quantized ring, or None if it collapses below a triangle."""
+    ring = quantize_ring(simplify_line(ring, tolerance), decimals)
+    return ring if len(ring) >= 4 else None
+
+
+def simplify_geometry(geometry, tolerance, decimals):
+    if geometry["type"] == "Polygon":
+        polygons = [geometry["coordinates"]]
+    else:
+        polygons = geometry["coordinates"]
+
+    simplified = []
+    for polygon in polygons:
+        exterior = simplify_ring(polygon[0], tolerance, decimals)
+        if exterior is None:
+            continue
+        holes = [h for h in (simplify_ring(r, tolerance, decimals) for r in polygon[1:]) if h]
+        simplified.append([exterior] + holes)
+
+    if not simplified:
+        # Every part is smaller than the tolerance; keep the largest one
+        # quantized but unsimplified so the region stays on the map.
+        largest = max(polygons, key=lambda p: len(p[0]))
+        simplified = [[quantize_ring(largest[0], decimals)]]
+    return {"type": "MultiPolygon", "coordinates": simplified}
+
+
+def build_geometry_tiers(iso3):
+    """Write every DETAIL_TIERS variant of a country's GeoJSON to SIMPLIFIED_DIR.
+
+    Only NAME_1 is kept in the properties, and each feature's id is preset
+    to it for plotly's featureidkey lookups.
+    """
+    with open(geojson_path(iso3), "r", encoding="utf-8") as f:
+        geojson_data = json.load(f)
+    os.makedirs(SIMPLIFIED_DIR, exist_ok=True)
+    for tier, (tolerance, decimals) in DETAIL_TIERS.items():
+        features = [
+            {
+                "type": "Feature",
+                "id": feature["properties"]["NAME_1"],
+                "properties": {"NAME_1": feature["properties"]["NAME_1"]},
+                "geometry": simplify_geometry(feature["geometry"], tolerance, decimals),
+            }
+            for feature in geojson_data["features"]
+        ]
+        path = tier_path(iso3, tier)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"type": "FeatureCollection", "features": features}, f,
+                      ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+
+def build_all_geometry_tiers():
+    for iso3 in geojson_files():
+        build_geometry_tiers(iso3)
+    print(f"✅ Simplified geometry tiers written to '{SIMPLIFIED_DIR}'.")
+
+
+def pick_tier(iso3, map_pixels=MAP_PIXELS):
+    """Coarsest tier whose tolerance stays under one pixel at `map_pixels` across."""
+    entry = load_region_index().get(iso3)
+    if not entry or not entry["bbox"]:
+        return list(DETAIL_TIERS)[-1]
+    min_x, min_y, max_x, max_y = entry["bbox"]
+    degrees_per_pixel = max(max_x - min_x, max_y - min_y) / map_pixels
+    for tier, (tolerance, _) in DETAIL_TIERS.items():
+        if tolerance <= degrees_per_pixel:
+            return tier
+    return list(DETAIL_TIERS)[-1]
+
+
+if __name__ == "__main__":
+    build_region_index()
+    build_all_geometry_tiers()
@@ -3,7 +3,14 @@ import pandas as pd
 import psycopg2
 from sqlalchemy import create_engine, text
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
-from transform import clean_data  # Ensure transform.py is in the same directory
+from extract import extract_chunks
+from transform import clean_data, clean_chunk, perform_fuzzy_matching, ISO3_MAPPING  # Ensure transform.py is in the same directory
+from matcher import build_crosswalk
+from term_grouping import update_term_groups
+from storage import read_cleaned, CLEANED_PATH
+from bulkload import copy_frame, copy_into, copy_many
+from dimensions import DimensionDictionary, load_dictionary
+from metrics import pipeline_metrics
 
 # === CONFIG ===
 DB_ADMIN_DB = os.getenv("DB_ADMIN_DB", "postgres")
@@ -14,9 +21,175 @@ DB_PORT     = os.getenv("DB_PORT", "5432")
 TARGET_DB   = os.getenv("DB_NAME", "trends_db")
 CSV_PATH    = os.getenv("CSV_PATH", "./actualDataTeamProject.csv")
 TABLE_NAME  = os.getenv("TABLE_NAME", "google_trends_international_cleaned")
+LOAD_MODE   = os.getenv("LOAD_MODE", "full")  # "full", "stream" or "incremental"
+CHUNK_SIZE  = int(os.getenv("CHUNK_SIZE", "100000"))
+
+# Natural keys, used to assign surrogate ids and as ON CONFLICT targets.
+COUNTRY_KEY = ["country_code"]
+REGION_KEY  = ["country_id", "region_name"]
+TERM_KEY    = ["term"]
+TREND_KEY   = ["term_id", "region_id", "week", "refresh_date"]
+
+# Columns of each normalized table.
+COUNTRY_COLS = ["country_id", "country_code", "country_name"]
+REGION_COLS  = ["region_id", "country_id", "region_name", "region_name_cleaned", "region_name_final"]
+TERM_COLS    = ["term_id", "term", "translate", "final_term"]
+TREND_COLS   = ["term_id", "region_id", "week", "refresh_date", "score", "country_id", "rank"]
+
+# Nullable integer dtypes of the integer columns, so COPY gets "1" rather than
+# "1.0" and nulls as \N even when a column arrives as float64.
+INTEGER_DTYPES = {"country_id": "Int16", "region_id": "Int32", "term_id": "Int32", "rank": "Int16"}
+
+# Dimension table -> (natural key columns, surrogate id column).
+DIMENSIONS = {
+    "countries": (COUNTRY_KEY, "country_id"),
+    "regions":   (REGION_KEY, "region_id"),
+    "terms":     (TERM_KEY, "term_id"),
+}
+
+# Tables are created bare; keys and foreign keys are added by add_constraints,
+# after the bulk COPY on full loads so the data goes in unchecked and unindexed.
+# Dimensions carry integer surrogate ids, so the trends fact table holds only
+# fixed-width columns (ordered widest first to avoid alignment padding).
+TABLES_SQL = """
+    CREATE TABLE IF NOT EXISTS countries (
+        country_id SMALLINT,
+        country_code TEXT,
+        country_name TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS regions (
+        region_id INTEGER,
+        country_id SMALLINT,
+        region_name TEXT,
+        region_name_cleaned TEXT,
+        region_name_final TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS terms (
+        term_id INTEGER,
+        term TEXT,
+        translate TEXT,
+        final_term TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS trends (
+        term_id INTEGER,
+        region_id INTEGER,
+        week DATE,
+        refresh_date DATE,
+        score REAL,
+        country_id SMALLINT,
+        rank SMALLINT
+    ) PARTITION BY RANGE (week);
+
+    -- Yearly partitions are added by ensure_partitions; rows without a valid
+    -- week land here.
+    CREATE TABLE IF NOT EXISTS trends_default PARTITION OF trends DEFAULT;
+
+    -- High-water mark of the data already loaded, used by incremental runs.
+    CREATE TABLE IF NOT EXISTS etl_watermark (
+        table_name TEXT PRIMARY KEY,
+        max_week DATE,
+        max_refresh_date DATE,
+        loaded_at TIMESTAMP DEFAULT now()
+    );
+
+    -- Dataset region -> GeoJSON NAME_1 with match confidence, rebuilt by
+    -- refresh_crosswalk after every load so the dashboard never re-matches.
+    CREATE TABLE IF NOT EXISTS region_crosswalk (
+        region_id INTEGER PRIMARY KEY,
+        country_code TEXT,
+        region_name TEXT,
+        geo_name TEXT,
+        confidence REAL,
+        method TEXT
+    );
+    CREATE INDEX IF NOT EXISTS region_crosswalk_country_idx ON region_crosswalk (country_code, region_name);
+"""
+
+# Pre-aggregated rollups for the Global-Level Stats page. rollup_term_weeks is
+# refreshed only for the weeks a load touched; rollup_term_totals sums it
+# over all weeks, and the views shape those totals for the page.
+ROLLUP_SQL = """
+    CREATE TABLE IF NOT EXISTS rollup_term_weeks (
+        week DATE,
+        country_id SMALLINT,
+        term_id INTEGER,
+        appearances INTEGER,
+        rank1_appearances INTEGER
+    );
+    CREATE INDEX IF NOT EXISTS rollup_term_weeks_week_idx ON rollup_term_weeks (week);
+
+    CREATE MATERIALIZED VIEW IF NOT EXISTS rollup_term_totals AS
+        SELECT country_id, term_id,
+               SUM(appearances)::INTEGER AS appearances,
+               SUM(rank1_appearances)::INTEGER AS rank1_appearances
+        FROM rollup_term_weeks
+        GROUP BY country_id, term_id
+    WITH NO DATA;
+
+    -- Most frequent rank 1 term(s) per country, ties joined alphabetically.
+    CREATE OR REPLACE VIEW country_top_rank1_terms AS
+        WITH counts AS (
+            SELECT r.country_id, t.translate, SUM(r.rank1_appearances) AS count
+            FROM rollup_term_totals r
+            JOIN terms t ON r.term_id = t.term_id
+            WHERE r.rank1_appearances > 0 AND t.translate IS NOT NULL
+            GROUP BY r.country_id, t.translate
+        ), ranked AS (
+            SELECT counts.*, MAX(count) OVER (PARTITION BY country_id) AS max_count
+            FROM counts
+        )
+        SELECT c.country_name,
+               string_agg(ranked.translate, ', ' ORDER BY ranked.translate COLLATE "C") AS top_terms,
+               MAX(ranked.count)::INTEGER AS count
+        FROM ranked
+        JOIN countries c ON ranked.country_id = c.country_id
+        WHERE ranked.count = ranked.max_count
+        GROUP BY c.country_name;
+
+    -- Number of top-search appearances of each grouped term per country.
+    CREATE OR REPLACE VIEW term_country_popularity AS
+        SELECT t.final_term, c.country_name, SUM(r.appearances)::INTEGER AS count
+        FROM rollup_term_totals r
+        JOIN terms t ON r.term_id = t.term_id
+        JOIN countries c ON r.country_id = c.country_id
+        GROUP BY t.final_term, c.country_name;
+"""
+
+SCHEMA_SQL = """
+    DROP TABLE IF EXISTS trends, regions, countries, terms, etl_watermark, rollup_term_weeks,
+        region_crosswalk CASCADE;
+""" + TABLES_SQL + ROLLUP_SQL
+
+# Secondary indexes matching the dashboard's access paths: one country's
+# top ranks over a range of weeks, and one term over time. They are built
+# after the data is loaded and followed by ANALYZE.
+INDEXES = [
+    ("trends_country_week_rank_idx", "trends (country_id, week, rank) INCLUDE (term_id, region_id)"),
+    ("trends_term_week_idx", "trends (term_id, week) INCLUDE (country_id)"),
+]
+
+# (table, constraint name, definition); keys before the foreign keys that need them.
+CONSTRAINTS = [
+    ("countries", "countries_pkey", "PRIMARY KEY (country_id)"),
+    ("countries", "countries_country_code_key", "UNIQUE (country_code)"),
+    ("regions", "regions_pkey", "PRIMARY KEY (region_id)"),
+    ("regions", "regions_country_id_region_name_key", "UNIQUE (country_id, region_name)"),
+    ("terms", "terms_pkey", "PRIMARY KEY (term_id)"),
+    ("terms", "terms_term_key", "UNIQUE (term)"),
+    ("trends", "trends_term_id_region_id_week_refresh_date_key",
+     "UNIQUE (term_id, region_id, week, refresh_date)"),
+    ("regions", "regions_country_id_fkey", "FOREIGN KEY (country_id) REFERENCES countries(country_id)"),
+    ("trends", "trends_country_id_fkey", "FOREIGN KEY (country_id) REFERENCES countries(country_id)"),
+    ("trends", "trends_region_id_fkey", "FOREIGN KEY (region_id) REFERENCES regions(region_id)"),
+    ("trends", "trends_term_id_fkey", "FOREIGN KEY (term_id) REFERENCES terms(term_id)"),
+]
+
 
 # === CREATE DB IF NEEDED ===
-try:
+def create_database():
     admin_conn = psycopg2.connect(
         dbname=DB_ADMIN_DB, user=DB_USER, password=DB_PASS, host=DB_HOST, port=DB_PORT
     )
@@ -32,98 +205,470 @@ try:
 
     admin_cur.close()
     admin_conn.close()
-except Exception as e:
-    print("❌ Failed to create/check database:", e)
-    exit(1)
 
-# === LOAD & CLEAN DATA ===
-try:
-    raw_df = pd.read_csv(CSV_PATH)
-    print(f"✅ Loaded raw CSV from '{CSV_PATH}'.")
-    df = clean_data(raw_df)
-    print(f"✅ Transformed raw CSV using 'transform.py'.")
-except Exception as e:
-    print("❌ Failed during CSV loading or transformation:", e)
-    exit(1)
 
 # === MERGE TERM GROUPS ===
-try:
-    term_groups = pd.read_csv("term_groups.csv")
+@pipeline_metrics.timed("term_grouping")
+def load_term_groups(terms=()):
+    # New translated terms are grouped incrementally before the merge.
+    term_groups = update_term_groups(terms)
     print(f"✅ Loaded term_groups.csv.")
+    return term_groups
+
+@pipeline_metrics.timed("term_merge")
+def merge_term_groups(df, term_groups):
     df = pd.merge(df, term_groups, how="left", on="translate")
     df["final_term"] = df["normalized_term"].fillna(df["translate"])
-    print("✅ Merged term groups.")
-except Exception as e:
-    print("❌ Merge failed:", e)
-    exit(1)
+    return df
 
-# === CONNECT TO POSTGRES ===
-engine = create_engine(f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{TARGET_DB}")
 
-try:
+# === SCHEMA ===
+def recreate_tables(engine):
     # Drop and Recreate Main Combined Table
     with engine.begin() as conn:
         conn.execute(text(f"DROP TABLE IF EXISTS {TABLE_NAME} CASCADE;"))
         print(f"✅ Dropped existing table '{TABLE_NAME}' if it existed.")
 
+    # Explicit schema creation for foreign key compatibility
+    with engine.begin() as conn:
+        conn.execute(text(SCHEMA_SQL))
+        print("✅ Normalized ERD tables recreated.")
+
+
+def add_constraints(conn):
+    """Add any missing keys and foreign keys; validated against the loaded data."""
+    existing = {row[0] for row in conn.execute(text("SELECT conname FROM pg_constraint"))}
+    for table, name, definition in CONSTRAINTS:
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}"))
+
+
+def ensure_partitions(conn, weeks):
+    """Create the yearly trends partitions covering `weeks`, if missing."""
+    years = sorted({ts.year for ts in pd.to_datetime(pd.Series(weeks).dropna().unique())})
+    for year in years:
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS trends_y{year} PARTITION OF trends "
+            f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+        ))
+
+
+@pipeline_metrics.timed("build_indexes")
+def build_indexes(engine):
+    with engine.begin() as conn:
+        for name, definition in INDEXES:
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}"))
+        conn.execute(text("ANALYZE countries, regions, terms, trends"))
+    print("✅ Indexes built and tables analyzed.")
+
+
+@pipeline_metrics.timed("refresh_rollups")
+def refresh_rollups(engine, weeks=None):
+    """Recompute the weekly rollup for `weeks` (every week when None) and its totals."""
+    with engine.begin() as conn:
+        if weeks is None:
+            conn.execute(text("TRUNCATE rollup_term_weeks"))
+            where, params = "", {}
+        else:
+            where, params = "WHERE week = ANY(:weeks)", {"weeks": list(weeks)}
+            conn.execute(text(f"DELETE FROM rollup_term_weeks {where}"), params)
+        conn.execute(text(f"""
+            INSERT INTO rollup_term_weeks (week, country_id, term_id, appearances, rank1_appearances)
+            SELECT week, country_id, term_id, COUNT(*), COUNT(*) FILTER (WHERE rank = 1)
+            FROM trends
+            {where}
+            GROUP BY week, country_id, term_id
+        """), params)
+        conn.execute(text("REFRESH MATERIALIZED VIEW rollup_term_totals"))
+    print("✅ Global rollups refreshed.")
+
+
+@pipeline_metrics.timed("refresh_crosswalk")
+def refresh_crosswalk(engine):
+    """Rebuild region_crosswalk from every region currently in the database."""
+    with engine.connect() as conn:
+        regions = pd.read_sql(text("""
+            SELECT r.region_id, c.country_code, c.country_name, r.region_name, r.region_name_final
+            FROM regions r
+            JOIN countries c ON r.country_id = c.country_id
+        """), conn)
+    regions["iso3"] = regions["country_name"].map(ISO3_MAPPING)
+    crosswalk = build_crosswalk(regions)
+
+    raw = engine.raw_connection()
+    try:
+        with raw.cursor() as cur:
+            cur.execute("TRUNCATE region_crosswalk")
+        copy_frame(raw, "region_crosswalk", crosswalk)
+        raw.commit()
+    finally:
+        raw.close()
+    unmatched = int(crosswalk["geo_name"].isna().sum())
+    print(f"✅ Region crosswalk rebuilt: {len(crosswalk)} regions, {unmatched} without a GeoJSON match.")
+
+
+def ensure_tables(engine):
+    with engine.begin() as conn:
+        conn.execute(text(TABLES_SQL))
+        add_constraints(conn)
+        conn.execute(text(ROLLUP_SQL))
+    print("✅ Normalized ERD tables present.")
+
+
+def table_exists(conn, table):
+    return conn.execute(text("SELECT to_regclass(:t) IS NOT NULL"), {"t": table}).scalar()
+
+
+# === SURROGATE KEYS ===
+def new_dictionaries():
+    return {table: DimensionDictionary() for table in DIMENSIONS}
+
+
+def load_dictionaries(engine):
+    """Natural key -> id mappings already stored in the dimension tables."""
+    with engine.connect() as conn:
+        return {
+            table: load_dictionary(conn, table, key_cols, id_col)
+            for table, (key_cols, id_col) in DIMENSIONS.items()
+        }
+
+
+@pipeline_metrics.timed("normalize")
+def cast_integer_columns(df):
+    """Give df's integer columns their nullable integer dtype, in place."""
+    for col, dtype in INTEGER_DTYPES.items():
+        if col in df.columns and df[col].dtype != dtype:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def normalized_frames(df, dictionaries):
+    """Dictionary-encode df's dimensions and split it into the normalized tables.
+
+    Surrogate ids are assigned through `dictionaries`, which keep the ids of
+    keys seen earlier (in the database or a previous chunk) stable.
+    """
+    df["country_id"] = dictionaries["countries"].encode(df[COUNTRY_KEY])
+    df["region_id"] = dictionaries["regions"].encode(df[REGION_KEY])
+    df["term_id"] = dictionaries["terms"].encode(df[TERM_KEY])
+    cast_integer_columns(df)
+    return (
+        df[COUNTRY_COLS].drop_duplicates(subset=COUNTRY_KEY),
+        df[REGION_COLS].drop_duplicates(subset=REGION_KEY),
+        df[TERM_COLS].drop_duplicates(subset=TERM_KEY),
+        df[TREND_COLS].drop_duplicates(subset=TREND_KEY, keep="last"),
+    )
+
+
+def copy_normalized(engine, countries_df, regions_df, terms_df, trends_df):
+    # Constraints are not in place yet, so all four tables can load at once.
+    rows = copy_many(engine, {
+        "countries": countries_df,
+        "regions": regions_df,
+        "terms": terms_df,
+        "trends": trends_df,
+    })
+    with engine.begin() as conn:
+        add_constraints(conn)
+    return rows
+
+
+def copy_combined(engine, df, replace=False):
+    """COPY the denormalized sanity-check table, creating it from df's dtypes if needed."""
+    cast_integer_columns(df)
+    with engine.begin() as conn:
+        if replace or not table_exists(conn, TABLE_NAME):
+            df.head(0).to_sql(TABLE_NAME, conn, index=False, if_exists="replace")
+    copy_into(engine, TABLE_NAME, df)
+
+
+def replace_combined_delta(engine, df, watermark):
+    """Replace the combined table's rows past `watermark` with `df`, in one transaction.
+
+    The watermark only moves once a whole incremental load succeeds, so rows
+    past it can only come from an earlier attempt that failed later on;
+    they are deleted first so a retry does not append the delta twice.
+    """
+    max_week, max_refresh = watermark
+    conditions, params = [], {}
+    if max_refresh is not None:
+        conditions.append("refresh_date > :max_refresh")
+        params["max_refresh"] = max_refresh
+    if max_week is not None:
+        conditions.append("week > :max_week")
+        params["max_week"] = max_week
+    where = f"WHERE {' OR '.join(conditions)}" if conditions else ""
+    cast_integer_columns(df)
+    with engine.begin() as conn:
+        if not table_exists(conn, TABLE_NAME):
+            df.head(0).to_sql(TABLE_NAME, conn, index=False)
+        deleted = conn.execute(text(f"DELETE FROM {TABLE_NAME} {where}"), params).rowcount
+        with pipeline_metrics.stage(f"load_{TABLE_NAME}", len(df)) as stage:
+            stage.rows_out = copy_frame(conn.connection, TABLE_NAME, df)
+    if deleted:
+        print(f"ℹ️ Replaced {deleted} rows left in '{TABLE_NAME}' by an earlier, unfinished run.")
+
+
+# === UPSERTS ===
+def upsert(conn, table, frame, key_cols, update_cols=()):
+    """Insert `frame` into `table` through a staging table, resolving key conflicts.
+
+    The frame is COPied into a temporary table shaped like `table`; rows whose
+    key already exists are updated in `update_cols`, or left alone when
+    `update_cols` is empty.
+    """
+    if frame.empty:
+        return
+    stage = f"_stage_{table}"
+    cols = ", ".join(frame.columns)
+    if update_cols:
+        action = "DO UPDATE SET " + ", ".join(f"{c} = EXCLUDED.{c}" for c in update_cols)
+    else:
+        action = "DO NOTHING"
+    with pipeline_metrics.stage(f"load_{table}", len(frame)) as timing:
+        conn.execute(text(f"CREATE TEMP TABLE {stage} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP"))
+        copy_frame(conn.connection, stage, frame)
+        result = conn.execute(text(
+            f"INSERT INTO {table} ({cols}) SELECT {cols} FROM {stage} "
+            f"ON CONFLICT ({', '.join(key_cols)}) {action}"
+        ))
+        conn.execute(text(f"DROP TABLE {stage}"))
+        timing.rows_out = result.rowcount
+
+
+def upsert_normalized(engine, countries_df, regions_df, terms_df, trends_df):
+    with engine.begin() as conn:
+        ensure_partitions(conn, trends_df["week"])
+        upsert(conn, "countries", countries_df, COUNTRY_KEY, ["country_name"])
+        upsert(conn, "regions", regions_df, REGION_KEY, ["region_name_cleaned", "region_name_final"])
+        upsert(conn, "terms", terms_df, TERM_KEY, ["translate", "final_term"])
+        upsert(conn, "trends", trends_df, TREND_KEY, ["score", "rank"])
+
+
+# === HIGH-WATER MARK ===
+def read_watermark(engine):
+    with engine.connect() as conn:
+        row = conn.execute(
+            text("SELECT max_week, max_refresh_date FROM etl_watermark WHERE table_name = 'trends'")
+        ).fetchone()
+    return (row[0], row[1]) if row else (None, None)
+
+
+def update_watermark(engine, df, previous=(None, None)):
+    return write_watermark(engine, advance_watermark(df, previous))
+
+
+def advance_watermark(df, previous=(None, None)):
+    """`previous` moved up to the latest week and refresh_date in df."""
+    return _latest(previous[0], _max_date(df["week"])), _latest(previous[1], _max_date(df["refresh_date"]))
+
+
+def write_watermark(engine, watermark):
+    max_week, max_refresh = watermark
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO etl_watermark (table_name, max_week, max_refresh_date, loaded_at)
+            VALUES ('trends', :week, :refresh, now())
+            ON CONFLICT (table_name) DO UPDATE SET
+                max_week = EXCLUDED.max_week,
+                max_refresh_date = EXCLUDED.max_refresh_date,
+                loaded_at = EXCLUDED.loaded_at
+        """), {"week": max_week, "refresh": max_refresh})
+    print(f"✅ High-water mark now week={max_week}, refresh_date={max_refresh}.")
+    return max_week, max_refresh
+
+
+def _latest(*dates):
+    dates = [d for d in dates if d is not None]
+    return max(dates) if dates else None
+
+
+def _max_date(series):
+    value = series.max()
+    return None if pd.isna(value) else pd.Timestamp(value).date()
+
+
+def newer_than(df, max_week, max_refresh):
+    """Rows past the high-water mark: a newer refresh or a newer week."""
+    if max_week is None and max_refresh is None:
+        return df
+    mask = pd.Series(False, index=df.index)
+    if max_refresh is not None:
+        mask |= df["refresh_date"] > pd.Timestamp(max_refresh)
+    if max_week is not None:
+        mask |= df["week"] > pd.Timestamp(max_week)
+    return df[mask]
+
+
+# === LOAD & CLEAN DATA ===
+def cleaned_is_current():
+    return os.path.exists(CLEANED_PATH) and (
+        not os.path.exists(CSV_PATH) or os.path.getmtime(CLEANED_PATH) >= os.path.getmtime(CSV_PATH)
+    )
+
+
+def read_source():
+    # Reuse the columnar output of transform.py when it is at least as new as the raw CSV.
+    if cleaned_is_current():
+        with pipeline_metrics.stage("read") as stage:
+            df = read_cleaned(path=CLEANED_PATH)
+            stage.rows_out = len(df)
+        print(f"✅ Loaded cleaned dataset from '{CLEANED_PATH}'.")
+        return df
+
+    with pipeline_metrics.stage("read") as stage:
+        raw_df = pd.read_csv(CSV_PATH)
+        stage.rows_out = len(raw_df)
+    print(f"✅ Loaded raw CSV from '{CSV_PATH}'.")
+    df = clean_data(raw_df)
+    print(f"✅ Transformed raw CSV using 'transform.py'.")
+    return df
+
+
+def read_delta(max_week, max_refresh):
+    """Cleaned rows past the high-water mark, without materializing the rest."""
+    if cleaned_is_current():
+        filters = None
+        if max_week is not None and max_refresh is not None and not CLEANED_PATH.endswith(".csv"):
+            filters = [[("refresh_date", ">", max_refresh)], [("week", ">", max_week)]]
+        with pipeline_metrics.stage("read") as stage:
+            df = newer_than(read_cleaned(path=CLEANED_PATH, filters=filters), max_week, max_refresh)
+            stage.rows_out = len(df)
+        print(f"✅ Read {len(df)} new rows from '{CLEANED_PATH}'.")
+        return df
+
+    frames = [
+        newer_than(clean_chunk(chunk), max_week, max_refresh)
+        for chunk in extract_chunks(CSV_PATH, CHUNK_SIZE)
+    ]
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    print(f"✅ Read {len(df)} new rows from '{CSV_PATH}'.")
+    if not df.empty:
+        perform_fuzzy_matching(df)
+    return df
+
+
+# === FULL (IN-MEMORY) LOAD ===
+def full_load(engine):
+    df = read_source()
+
+    df = merge_term_groups(df, load_term_groups(df["translate"]))
+    print("✅ Merged term groups.")
+
+    recreate_tables(engine)
+
     # Upload combined table for sanity check
-    df.to_sql(TABLE_NAME, engine, index=False, if_exists="replace")
+    copy_combined(engine, df, replace=True)
     print(f"✅ Data uploaded to table '{TABLE_NAME}' in database '{TARGET_DB}'.")
 
-    # Prepare normalized dataframes
-    countries_df = df[["country_code", "country_name"]].drop_duplicates()
-    regions_df = df[["region_name", "country_code", "region_name_cleaned", "region_name_final"]].drop_duplicates()
-    terms_df = df[["term", "translate", "final_term"]].drop_duplicates()
-    trends_df = df[["term", "region_name", "country_code", "week", "score", "refresh_date", "rank"]].drop_duplicates()
+    with engine.begin() as conn:
+        ensure_partitions(conn, df["week"])
+    rows = copy_normalized(engine, *normalized_frames(df, new_dictionaries()))
+    build_indexes(engine)
+    refresh_rollups(engine)
+    refresh_crosswalk(engine)
+    update_watermark(engine, df)
+    print(f"✅ Normalized ERD tables created and populated: {rows}.")
 
-    # Explicit schema creation for foreign key compatibility
+
+# === STREAMING (CHUNKED) LOAD ===
+def stream_load(engine):
+    """Extract, clean and load the raw CSV one bounded chunk at a time.
+
+    Only the surrogate key dictionaries and the distinct (country, region)
+    pairs are kept across chunks, so memory stays proportional to CHUNK_SIZE rather than to
+    the size of the input file.
+    """
+    recreate_tables(engine)
     with engine.begin() as conn:
-        conn.execute(text("""
-            DROP TABLE IF EXISTS trends, regions, countries, terms CASCADE;
-
-            CREATE TABLE countries (
-                country_code TEXT PRIMARY KEY,
-                country_name TEXT
-            );
-
-            CREATE TABLE regions (
-                region_name TEXT,
-                country_code TEXT,
-                region_name_cleaned TEXT,
-                region_name_final TEXT,
-                PRIMARY KEY (region_name, country_code),
-                FOREIGN KEY (country_code) REFERENCES countries(country_code)
-            );
-
-            CREATE TABLE terms (
-                term TEXT PRIMARY KEY,
-                translate TEXT,
-                final_term TEXT
-            );
-
-            CREATE TABLE trends (
-                trend_id SERIAL PRIMARY KEY,
-                region_name TEXT,
-                country_code TEXT,
-                term TEXT,
-                week DATE,
-                score DOUBLE PRECISION,
-                refresh_date DATE,
-                rank INTEGER,
-                FOREIGN KEY (region_name, country_code) REFERENCES regions(region_name, country_code),
-                FOREIGN KEY (term) REFERENCES terms(term)
-            );
-        """))
-        print("✅ Normalized ERD tables recreated.")
+        add_constraints(conn)
+
+    dictionaries = new_dictionaries()
+    watermark = (None, None)
+    region_pairs = []
+    total_rows = 0
+
+    for i, chunk in enumerate(extract_chunks(CSV_PATH, CHUNK_SIZE)):
+        chunk = clean_chunk(chunk)
+        term_groups = load_term_groups(chunk["translate"])
+        chunk = merge_term_groups(chunk, term_groups)
+
+        copy_combined(engine, chunk, replace=(i == 0))
+        # Upserted because a key may repeat in a later chunk.
+        upsert_normalized(engine, *normalized_frames(chunk, dictionaries))
+        # Written once every chunk is in; a partial watermark would make a
+        # later incremental run skip the chunks that never loaded.
+        watermark = advance_watermark(chunk, watermark)
+
+        region_pairs.append(chunk[["country_name", "region_name_final"]].drop_duplicates())
+        total_rows += len(chunk)
+        print(f"✅ Chunk {i + 1}: loaded {len(chunk)} rows ({total_rows} total).")
+
+    build_indexes(engine)
+    refresh_rollups(engine)
+    refresh_crosswalk(engine)
+    write_watermark(engine, watermark)
+    if region_pairs:
+        # The fuzzy match report only needs the distinct regions, not the rows.
+        perform_fuzzy_matching(pd.concat(region_pairs).drop_duplicates())
+    print(f"✅ Streamed {total_rows} rows into '{TABLE_NAME}' and the normalized ERD tables.")
+
+
+# === INCREMENTAL LOAD ===
+def incremental_load(engine):
+    """Load only rows newer than the stored high-water mark.
+
+    Dimensions and facts are upserted with ON CONFLICT and the combined
+    table's rows past the watermark are replaced, so re-running the same
+    delta is harmless and the work done is proportional to the new rows.
+    """
+    ensure_tables(engine)
+    watermark = read_watermark(engine)
+    print(f"ℹ️ High-water mark: week={watermark[0]}, refresh_date={watermark[1]}.")
+
+    df = read_delta(*watermark)
+    if df.empty:
+        print("ℹ️ No rows past the high-water mark; nothing to load.")
+        return
+
+    df = merge_term_groups(df, load_term_groups(df["translate"]))
+    replace_combined_delta(engine, df, watermark)
+    upsert_normalized(engine, *normalized_frames(df, load_dictionaries(engine)))
+    build_indexes(engine)
+    with engine.connect() as conn:
+        has_rollups = conn.execute(text("SELECT EXISTS (SELECT 1 FROM rollup_term_weeks)")).scalar()
+    # The first incremental run after an upgrade backfills every week.
+    weeks = sorted({ts.date() for ts in pd.to_datetime(df["week"].dropna().unique())})
+    refresh_rollups(engine, weeks if has_rollups else None)
+    refresh_crosswalk(engine)
+    update_watermark(engine, df, watermark)
+    print(f"✅ Upserted {len(df)} new rows into the normalized ERD tables.")
+
+
+def main():
+    pipeline_metrics.start("load", mode=LOAD_MODE)
+    try:
+        create_database()
+    except Exception as e:
+        print("❌ Failed to create/check database:", e)
+        exit(1)
+
+    # === CONNECT TO POSTGRES ===
+    engine = create_engine(f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{TARGET_DB}")
 
-    # Insert normalized data
-    countries_df.to_sql("countries", engine, index=False, if_exists="append")
-    regions_df.to_sql("regions", engine, index=False, if_exists="append")
-    terms_df.to_sql("terms", engine, index=False, if_exists="append")
-    trends_df.to_sql("trends", engine, index=False, if_exists="append")
+    try:
+        if LOAD_MODE == "stream":
+            stream_load(engine)
+        elif LOAD_MODE == "incremental":
+            incremental_load(engine)
+        else:
+            full_load(engine)
+    except Exception as e:
+        print(f"❌ Failed to load data into PostgreSQL:", e)
+        pipeline_metrics.write_report(status="failed")
+        exit(1)
+    pipeline_metrics.write_report()
 
-    print("✅ Normalized ERD tables created and populated.")
 
-except Exception as e:
-    print(f"❌ Failed to upload data to PostgreSQL:", e)
-    exit(1)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import os
+import re
+import json
+import zlib
+import unicodedata
+import pandas as pd
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from difflib import SequenceMatcher
+from geodata import country_regions, load_region_index, region_names
+
+# === CONFIG ===
+MATCH_CACHE_PATH = os.getenv("MATCH_CACHE_PATH", "region_match_cache.json")
+MATCH_WORKERS    = int(os.getenv("MATCH_WORKERS", "0")) or os.cpu_count()
+
+NGRAM_SIZE     = 3
+TOP_CANDIDATES = 8  # only this many index hits get an exact SequenceMatcher score
+FULL_SCAN_BELOW = 0.80  # weak matches are re-checked against every region
+CROSSWALK_CUTOFF = float(os.getenv("CROSSWALK_CUTOFF", "0.80"))  # weakest fuzzy match kept in the crosswalk
+
+
+def ngrams(name, n=NGRAM_SIZE):
+    padded = f"{' ' * (n - 1)}{name.lower()} "
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class NgramIndex:
+    """Inverted n-gram index over one country's region names.
+
+    Candidates are ranked by n-gram Dice overlap, and only the best few are
+    scored with SequenceMatcher.
+    """
+
+    def __init__(self, names):
+        self.names = list(names)
+        self.sizes = []
+        self.postings = defaultdict(list)
+        for i, name in enumerate(self.names):
+            grams = ngrams(name)
+            self.sizes.append(len(grams))
+            for gram in grams:
+                self.postings[gram].append(i)
+
+    def candidates(self, query, k=TOP_CANDIDATES):
+        grams = ngrams(query)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+        if not shared:
+            return self.names
+        dice = {i: 2 * c / (len(grams) + self.sizes[i]) for i, c in shared.items()}
+        top = sorted(dice, key=lambda i: (-dice[i], i))[:k]
+        # Keep index order so ties resolve exactly like a full scan would.
+        return [self.names[i] for i in sorted(top)]
+
+    def best_match(self, query):
+        best_match, best_score = self._score(query, self.candidates(query))
+        if best_score < FULL_SCAN_BELOW:
+            # Poor matches get reported, so make sure they are the true best.
+            best_match, best_score = self._score(query, self.names)
+        return best_match, best_score
+
+    @staticmethod
+    def _score(query, names):
+        best_match, best_score = None, -1.0
+        for name in names:
+            score = SequenceMatcher(None, query, name).ratio()
+            if score > best_score:
+                best_match, best_score = name, score
+        return best_match, best_score
+
+
+def names_signature(names):
+    return zlib.crc32("\n".join(names).encode("utf-8"))
+
+
+def match_country(iso3, regions, names=None):
+    """Best GADM match and similarity score for each dataset region of one country."""
+    index = NgramIndex(names if names is not None else region_names(iso3))
+    return {region: index.best_match(region) for region in regions}
+
+
+def _match_country_job(args):
+    iso3, regions, names = args
+    return iso3, match_country(iso3, regions, names)
+
+
+# === PERSISTENT CACHE ===
+def load_match_cache(path=MATCH_CACHE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_match_cache(cache, path=MATCH_CACHE_PATH):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def match_regions(regions_by_iso3, workers=MATCH_WORKERS, cache_path=MATCH_CACHE_PATH):
+    """Match dataset regions to GADM regions for many countries at once.
+
+    `regions_by_iso3` maps ISO3 code -> iterable of dataset region strings.
+    Results are memoized per (country, region string) in `cache_path`; a
+    country's entries are dropped when its GADM region names change. Only
+    uncached names are scored, one country per worker process.
+
+    Returns ISO3 -> {region: (best_match, score)}; countries without a
+    GeoJSON file are omitted.
+    """
+    cache = load_match_cache(cache_path)
+    region_index = load_region_index()
+    available, jobs = [], []
+    for iso3, regions in regions_by_iso3.items():
+        if iso3 not in region_index:
+            continue
+        available.append(iso3)
+        names = region_names(iso3)
+        signature = names_signature(names)
+        entry = cache.get(iso3)
+        if entry is None or entry.get("signature") != signature:
+            entry = cache[iso3] = {"signature": signature, "matches": {}}
+        missing = [r for r in regions if r not in entry["matches"]]
+        if missing:
+            jobs.append((iso3, missing, names))
+
+    if jobs:
+        if workers and workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+                results = list(pool.map(_match_country_job, jobs))
+        else:
+            results = [_match_country_job(job) for job in jobs]
+        for iso3, matches in results:
+            cache[iso3]["matches"].update({r: list(m) for r, m in matches.items()})
+        save_match_cache(cache, cache_path)
+
+    return {
+        iso3: {r: tuple(cache[iso3]["matches"][r]) for r in regions_by_iso3[iso3]}
+        for iso3 in available
+    }
+
+
+# === REGION CROSSWALK ===
+def normalize_str(s):
+    if pd.isna(s): return ""
+    s = str(s)
+    s = unicodedata.normalize('NFKD', s).encode('ASCII', 'ignore').decode('utf-8')
+    s = re.sub(r'\s+', '', s)
+    s = re.sub(r'[^\w]', '', s)
+    return s.lower()
+
+
+def crosswalk_country(iso3, region_finals):
+    """(NAME_1, confidence, method) for each cleaned region name of one country.
+
+    Names equal after normalize_str are exact matches; otherwise the closest
+    GeoJSON name is kept if it scores at least CROSSWALK_CUTOFF.
+    """
+    names = [r["name"] for r in country_regions(iso3)]
+    if not names:
+        return {region: (None, 0.0, "no_geojson") for region in region_finals}
+    by_norm = {normalize_str(name): name for name in names}
+    index = NgramIndex(list(by_norm))
+    results = {}
+    for region in region_finals:
+        norm = normalize_str(region)
+        if norm in by_norm:
+            results[region] = (by_norm[norm], 1.0, "exact")
+            continue
+        best, score = index.best_match(norm) if norm else (None, 0.0)
+        if best is not None and score >= CROSSWALK_CUTOFF:
+            results[region] = (by_norm[best], round(score, 4), "fuzzy")
+        else:
+            results[region] = (None, round(max(score, 0.0), 4), "unmatched")
+    return results
+
+
+def build_crosswalk(regions):
+    """Crosswalk rows for a frame of dataset regions.
+
+    `regions` needs region_id, country_code, region_name, region_name_final
+    and iso3 columns; the result maps each region to its GeoJSON NAME_1
+    (geo_name) with a confidence score and the method that produced it.
+    """
+    rows = []
+    for iso3, group in regions.groupby("iso3", dropna=False, sort=False):
+        iso3 = None if iso3 != iso3 else iso3
+        finals = group["region_name_final"].fillna("")
+        matches = crosswalk_country(iso3, finals.unique()) if iso3 else {}
+        for row, final in zip(group.itertuples(index=False), finals):
+            geo_name, confidence, method = matches.get(final, (None, 0.0, "no_geojson"))
+            rows.append((row.region_id, row.country_code, row.region_name, geo_name, confidence, method))
+    return pd.DataFrame(rows, columns=["region_id", "country_code", "region_name", "geo_name", "confidence", "method"])
@@ -0,0 +1,241 @@
+import os
+import json
+import time
+import resource
+import threading
+import functools
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# === CONFIG ===
+METRICS_DIR         = os.getenv("METRICS_DIR", "etl_metrics")  # "" turns the reports off
+METRICS_OPENMETRICS = os.getenv("METRICS_OPENMETRICS", "0") == "1"
+METRICS_TRACEMALLOC = os.getenv("METRICS_TRACEMALLOC", "0") == "1"  # exact Python peaks, but slower
+
+# ru_maxrss is in kilobytes on Linux and bytes on macOS.
+MAXRSS_UNIT = 1 if os.uname().sysname == "Darwin" else 1024
+
+# (report field, OpenMetrics name, type, help) for each per-stage metric.
+STAGE_METRICS = [
+    ("calls", "etl_stage_calls", "gauge", "Times the stage ran"),
+    ("wall_seconds", "etl_stage_wall_seconds", "gauge", "Wall-clock time spent in the stage"),
+    ("cpu_seconds", "etl_stage_cpu_seconds", "gauge", "CPU time spent in the stage"),
+    ("rows_in", "etl_stage_rows_in", "gauge", "Rows passed into the stage"),
+    ("rows_out", "etl_stage_rows_out", "gauge", "Rows the stage produced"),
+    ("max_rss_bytes", "etl_stage_max_rss_bytes", "gauge", "Process peak resident memory when the stage ended"),
+    ("rss_growth_bytes", "etl_stage_rss_growth_bytes", "gauge", "Growth of the process peak resident memory during the stage"),
+    ("peak_traced_bytes", "etl_stage_peak_traced_bytes", "gauge", "Peak Python allocations during the stage (tracemalloc)"),
+]
+
+
+def max_rss_bytes():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * MAXRSS_UNIT
+
+
+def _cpu_seconds():
+    # Includes finished worker processes, e.g. the fuzzy matching pool.
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def _row_count(value):
+    return len(value) if hasattr(value, "shape") else None
+
+
+class Stage:
+    """One timed run of a stage; callers may fill in rows_in/rows_out."""
+
+    def __init__(self, name, rows_in=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.max_rss_bytes = 0
+        self.rss_growth_bytes = 0
+        self.peak_traced_bytes = None
+
+
+# === RUN METRICS ===
+class PipelineMetrics:
+    """Per-stage wall time, CPU time, rows and memory for one ETL run.
+
+    Stages run on the main thread measure process CPU time (worker processes
+    included once they exit); stages run on other threads, such as the
+    concurrent table COPYs, measure that thread's CPU time. With
+    METRICS_TRACEMALLOC=1 main-thread stages also record their peak Python
+    allocations; nested stages fold their peak into the enclosing one.
+    Stages recorded in worker processes are sent back and added with merge().
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.start("etl")
+
+    def start(self, pipeline, **labels):
+        """Begin a new run, discarding any stages recorded so far."""
+        with self.lock:
+            self.pipeline = pipeline
+            self.labels = labels
+            self.stages = []
+            self.started_at = datetime.now(timezone.utc)
+            self.started = time.perf_counter()
+            self.started_cpu = _cpu_seconds()
+        if METRICS_TRACEMALLOC and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        record = Stage(name, rows_in)
+        main = threading.current_thread() is threading.main_thread()
+        cpu_clock = _cpu_seconds if main else time.thread_time
+        traced = main and tracemalloc.is_tracing()
+        stack = self.local.__dict__.setdefault("stack", [])
+        if traced:
+            if stack and stack[-1].peak_traced_bytes is not None:
+                stack[-1].peak_traced_bytes = max(stack[-1].peak_traced_bytes, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            record.peak_traced_bytes = 0
+        stack.append(record)
+        rss_before = max_rss_bytes()
+        cpu_before = cpu_clock()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.wall_seconds = time.perf_counter() - start
+            record.cpu_seconds = cpu_clock() - cpu_before
+            record.max_rss_bytes = max_rss_bytes()
+            record.rss_growth_bytes = record.max_rss_bytes - rss_before
+            stack.pop()
+            if traced:
+                record.peak_traced_bytes = max(record.peak_traced_bytes, tracemalloc.get_traced_memory()[1])
+                if stack and stack[-1].peak_traced_bytes is not None:
+                    stack[-1].peak_traced_bytes = max(stack[-1].peak_traced_bytes, record.peak_traced_bytes)
+            with self.lock:
+                self.stages.append(record)
+
+    def merge(self, records):
+        """Add Stage records measured elsewhere, e.g. in a worker process."""
+        with self.lock:
+            self.stages.extend(records)
+
+    def timed(self, name):
+        """Decorator recording each call as stage `name`.
+
+        Rows in and out are taken from a DataFrame/Series first argument and
+        return value.
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name, _row_count(args[0]) if args else None) as record:
+                    result = func(*args, **kwargs)
+                    record.rows_out = _row_count(result)
+                return result
+            return wrapper
+        return decorator
+
+    # === REPORTS ===
+    def summary(self):
+        """Stages aggregated by name, in the order they first ran."""
+        with self.lock:
+            stages = list(self.stages)
+        totals = {}
+        for record in stages:
+            total = totals.setdefault(record.name, {
+                "stage": record.name, "calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0,
+                "rows_in": None, "rows_out": None, "max_rss_bytes": 0, "rss_growth_bytes": 0,
+                "peak_traced_bytes": None,
+            })
+            total["calls"] += 1
+            total["wall_seconds"] += record.wall_seconds
+            total["cpu_seconds"] += record.cpu_seconds
+            total["rss_growth_bytes"] += record.rss_growth_bytes
+            total["max_rss_bytes"] = max(total["max_rss_bytes"], record.max_rss_bytes)
+            for field in ("rows_in", "rows_out"):
+                value = getattr(record, field)
+                if value is not None:
+                    total[field] = (total[field] or 0) + value
+            if record.peak_traced_bytes is not None:
+                total["peak_traced_bytes"] = max(total["peak_traced_bytes"] or 0, record.peak_traced_bytes)
+        for total in totals.values():
+            total["wall_seconds"] = round(total["wall_seconds"], 4)
+            total["cpu_seconds"] = round(total["cpu_seconds"], 4)
+        return list(totals.values())
+
+    def report(self, status="success"):
+        return {
+            "pipeline": self.pipeline,
+            "labels": self.labels,
+            "status": status,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "wall_seconds": round(time.perf_counter() - self.started, 4),
+            "cpu_seconds": round(_cpu_seconds() - self.started_cpu, 4),
+            "max_rss_bytes": max_rss_bytes(),
+            "stages": self.summary(),
+        }
+
+    def write_report(self, status="success", directory=METRICS_DIR, openmetrics=METRICS_OPENMETRICS):
+        """Write <pipeline>.json (and <pipeline>.prom in OpenMetrics text) under `directory`."""
+        if not directory:
+            return None
+        report = self.report(status)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"{self.pipeline}.json")
+            _write_atomic(path, json.dumps(report, indent=2))
+            if openmetrics:
+                _write_atomic(os.path.join(directory, f"{self.pipeline}.prom"), to_openmetrics(report))
+        except OSError as e:
+            print(f"❌ Failed to write the run report: {e}")
+            return None
+        slowest = sorted(report["stages"], key=lambda s: -s["wall_seconds"])[:3]
+        print(f"✅ Run report written to '{path}' ({report['wall_seconds']:.1f}s; slowest: "
+              + ", ".join(f"{s['stage']} {s['wall_seconds']:.1f}s" for s in slowest) + ").")
+        return report
+
+
+def _write_atomic(path, content):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def _label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def to_openmetrics(report):
+    """The run report as an OpenMetrics text exposition, ready for a textfile scraper."""
+    base = {"pipeline": report["pipeline"], **report["labels"]}
+
+    def labels(**extra):
+        return "{" + ",".join(f'{k}="{_label_value(v)}"' for k, v in {**base, **extra}.items()) + "}"
+
+    lines = []
+    for field, name, kind, help_text in STAGE_METRICS:
+        samples = [s for s in report["stages"] if s[field] is not None]
+        if not samples:
+            continue
+        lines += [f"# TYPE {name} {kind}", f"# HELP {name} {help_text}."]
+        lines += [f"{name}{labels(stage=s['stage'])} {s[field]}" for s in samples]
+    finished = datetime.fromisoformat(report["finished_at"]).timestamp()
+    lines += [
+        "# TYPE etl_run_wall_seconds gauge", f"etl_run_wall_seconds{labels()} {report['wall_seconds']}",
+        "# TYPE etl_run_cpu_seconds gauge", f"etl_run_cpu_seconds{labels()} {report['cpu_seconds']}",
+        "# TYPE etl_run_max_rss_bytes gauge", f"etl_run_max_rss_bytes{labels()} {report['max_rss_bytes']}",
+        "# TYPE etl_run_success gauge", f"etl_run_success{labels()} {int(report['status'] == 'success')}",
+        "# TYPE etl_run_finished_timestamp_seconds gauge",
+        f"etl_run_finished_timestamp_seconds{labels()} {finished:.3f}",
+        "# EOF",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+pipeline_metrics = PipelineMetrics()
@@ -0,0 +1,160 @@
+import os
+import json
+import time
+import logging
+import threading
+import functools
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+# === CONFIG ===
+PROFILE_PANEL    = os.getenv("PROFILE_PANEL", "0") == "1"  # offer the debug sidebar panel
+PROFILE_LOG_PATH = os.getenv("PROFILE_LOG_PATH", "dashboard_profile.jsonl")  # "" turns the log off
+PROFILE_LOG_MB   = int(os.getenv("PROFILE_LOG_MB", "50"))
+PROFILE_WINDOW   = int(os.getenv("PROFILE_WINDOW", "500"))
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def result_size(value):
+    """(rows, bytes) of a loader result, where they are cheap to tell."""
+    if hasattr(value, "shape"):
+        return len(value), None
+    if isinstance(value, (bytes, str)):
+        return None, len(value)
+    if isinstance(value, (list, tuple)):
+        return len(value), None
+    if isinstance(value, dict) and "features" in value:
+        return len(value["features"]), None
+    return None, None
+
+
+def _json_logger(path):
+    if not path:
+        return None
+    logger = logging.getLogger("dashboard.profile")
+    logger.propagate = False
+    if not logger.handlers:
+        try:
+            handler = RotatingFileHandler(path, maxBytes=PROFILE_LOG_MB * 1024 * 1024, backupCount=3)
+        except OSError as e:
+            print(f"❌ Profiling log '{path}' unavailable: {e}")
+            return None
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+    return logger
+
+
+class Span:
+    """One timed loader call or render block; callers may fill in the details."""
+
+    def __init__(self, name, kind, cache=None):
+        self.name = name
+        self.kind = kind
+        self.cache = cache
+        self.rows = None
+        self.bytes = None
+
+
+# === PROFILER ===
+class Profiler:
+    """Durations, cache outcomes and sizes per loader and render block.
+
+    Kept per process over a sliding window of PROFILE_WINDOW events per
+    name, so the percentiles cover every session of the replica; each event
+    is also written as one JSON line to PROFILE_LOG_PATH.
+    """
+
+    def __init__(self, window=PROFILE_WINDOW, log_path=PROFILE_LOG_PATH):
+        self.kinds = {}
+        self.durations = defaultdict(lambda: deque(maxlen=window))
+        self.counts = defaultdict(lambda: defaultdict(int))
+        self.rows = defaultdict(lambda: deque(maxlen=window))
+        self.bytes = defaultdict(lambda: deque(maxlen=window))
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.logger = _json_logger(log_path)
+
+    def record(self, name, kind, seconds, cache=None, rows=None, nbytes=None):
+        with self.lock:
+            self.kinds[name] = kind
+            self.durations[name].append(seconds)
+            self.counts[name]["calls"] += 1
+            if cache is not None:
+                self.counts[name][cache] += 1
+            if rows is not None:
+                self.rows[name].append(rows)
+            if nbytes is not None:
+                self.bytes[name].append(nbytes)
+        self.log(name=name, kind=kind, ms=round(seconds * 1000, 2), cache=cache, rows=rows, bytes=nbytes)
+
+    def log(self, **fields):
+        """Append one event to the JSON log without adding it to the report."""
+        if self.logger is not None:
+            self.logger.info(json.dumps({"ts": round(time.time(), 3), **fields}))
+
+    @contextmanager
+    def span(self, name, kind="render", cached=False):
+        """Time the enclosed block; with `cached`, it counts as a hit unless mark_miss() is called."""
+        span = Span(name, kind, "hit" if cached else None)
+        stack = self.local.__dict__.setdefault("stack", [])
+        stack.append(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            stack.pop()
+            self.record(name, kind, time.perf_counter() - start, span.cache, span.rows, span.bytes)
+
+    def mark_miss(self):
+        """Called from inside a cached function's body, which only runs on a miss."""
+        stack = self.local.__dict__.get("stack")
+        if stack:
+            stack[-1].cache = "miss"
+
+    def report(self):
+        with self.lock:
+            report = []
+            for name, durations in self.durations.items():
+                counts = self.counts[name]
+                lookups = counts["hit"] + counts["shared"] + counts["miss"]
+                report.append({
+                    "name": name,
+                    "kind": self.kinds[name],
+                    "calls": counts["calls"],
+                    "p50_ms": round(percentile(durations, 0.50) * 1000, 2),
+                    "p95_ms": round(percentile(durations, 0.95) * 1000, 2),
+                    "max_ms": round(max(durations) * 1000, 2),
+                    "hits": counts["hit"],
+                    "shared_hits": counts["shared"],
+                    "misses": counts["miss"],
+                    "hit_rate": round((counts["hit"] + counts["shared"]) / lookups, 3) if lookups else None,
+                    "rows_p50": percentile(self.rows[name], 0.50),
+                    "bytes_p50": percentile(self.bytes[name], 0.50),
+                    "bytes_max": max(self.bytes[name]) if self.bytes[name] else None,
+                })
+            return report
+
+
+profiler = Profiler()
+
+
+def profiled(name, kind="loader"):
+    """Decorator for cached loaders: times each call and counts it as a hit
+    unless the wrapped body calls profiler.mark_miss()."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profiler.span(name, kind, cached=True) as span:
+                result = func(*args, **kwargs)
+                span.rows, span.bytes = result_size(result)
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,289 @@
+import io
+import os
+import json
+import time
+import zlib
+import hashlib
+import threading
+
+import pyarrow as pa
+
+# === CONFIG ===
+SHARED_CACHE          = os.getenv("SHARED_CACHE", "disk")  # "disk", "redis" or "none"
+SHARED_CACHE_DIR      = os.getenv("SHARED_CACHE_DIR", "shared_cache")
+SHARED_CACHE_MAX_MB   = int(os.getenv("SHARED_CACHE_MAX_MB", "1024"))
+SHARED_CACHE_TTL      = int(os.getenv("SHARED_CACHE_TTL", "86400"))
+SHARED_CACHE_LOCK_TTL = float(os.getenv("SHARED_CACHE_LOCK_TTL", "60"))
+REDIS_URL             = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+POLL_SECONDS = 0.05
+
+
+# === SERIALIZATION ===
+def dump_frame(df):
+    """A DataFrame (index included) as an Arrow IPC stream."""
+    table = pa.Table.from_pandas(df)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def load_frame(buffer):
+    return pa.ipc.open_stream(pa.py_buffer(buffer)).read_all().to_pandas()
+
+
+def dump_json(value):
+    return zlib.compress(json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def load_json(buffer):
+    return json.loads(zlib.decompress(buffer).decode("utf-8"))
+
+
+def dump_text(value):
+    return zlib.compress(value.encode("utf-8"))
+
+
+def load_text(buffer):
+    return zlib.decompress(buffer).decode("utf-8")
+
+
+# === BACKENDS ===
+class DiskBackend:
+    """Entries as files under one directory.
+
+    Replicas sharing the directory (e.g. a mounted volume) share the cache.
+    Fill locks are lock files created with O_EXCL.
+    """
+
+    def __init__(self, directory=SHARED_CACHE_DIR, max_bytes=SHARED_CACHE_MAX_MB * 1024 * 1024,
+                 ttl=SHARED_CACHE_TTL):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.bin")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            with open(path, "rb") as f:
+                return f.read()
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key, data):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._prune()
+
+    def acquire(self, key, ttl=SHARED_CACHE_LOCK_TTL):
+        lock_path = f"{self._path(key)}.lock"
+        try:
+            if time.time() - os.path.getmtime(lock_path) > ttl:
+                os.remove(lock_path)  # left behind by a crashed filler
+        except OSError:
+            pass
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            return False
+
+    def release(self, key):
+        try:
+            os.remove(f"{self._path(key)}.lock")
+        except OSError:
+            pass
+
+    def _prune(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".bin"):
+                path = os.path.join(self.directory, name)
+                try:
+                    entries.append((os.path.getmtime(path), os.path.getsize(path), path))
+                except OSError:
+                    continue
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+class RedisBackend:
+    """Entries in Redis (or anything speaking its protocol), with SET NX fill locks."""
+
+    def __init__(self, url=REDIS_URL, ttl=SHARED_CACHE_TTL):
+        import redis  # optional; only needed with SHARED_CACHE=redis
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def get(self, key):
+        return self.client.get(f"trends:{key}")
+
+    def set(self, key, data):
+        self.client.set(f"trends:{key}", data, ex=self.ttl)
+
+    def acquire(self, key, ttl=SHARED_CACHE_LOCK_TTL):
+        return bool(self.client.set(f"trends:{key}:lock", b"1", nx=True, px=int(ttl * 1000)))
+
+    def release(self, key):
+        self.client.delete(f"trends:{key}:lock")
+
+
+BACKENDS = {"disk": DiskBackend, "redis": RedisBackend}
+
+
+# === SHARED CACHE ===
+class SharedCache:
+    """Cross-replica cache of serialized values with request coalescing.
+
+    Concurrent misses for one key are coalesced twice: threads of a process
+    wait for the thread already filling the key, and processes wait on the
+    backend's fill lock, so only one caller per key runs the loader. No lock
+    is held while a loader runs, so loaders may use the cache themselves.
+    Backend failures fall back to calling the loader directly.
+    """
+
+    def __init__(self, backend=None, lock_ttl=SHARED_CACHE_LOCK_TTL):
+        self.backend = backend
+        self.lock_ttl = lock_ttl
+        self.filling = {}  # digest -> Event set once the filling thread is done
+        self.filling_lock = threading.Lock()
+        self.counts = {"hits": 0, "misses": 0, "coalesced": 0, "errors": 0, "bytes_read": 0, "bytes_written": 0}
+        self.counts_lock = threading.Lock()
+
+    def _count(self, name, n=1):
+        with self.counts_lock:
+            self.counts[name] += n
+
+    def stats(self):
+        with self.counts_lock:
+            return {"backend": type(self.backend).__name__ if self.backend else None, **self.counts}
+
+    @staticmethod
+    def digest(key):
+        return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+
+    def _read(self, key, loads):
+        try:
+            data = self.backend.get(key)
+        except Exception as e:
+            self._count("errors")
+            print(f"❌ Shared cache read failed: {e}")
+            return None
+        if data is None:
+            return None
+        self._count("bytes_read", len(data))
+        return loads(data)
+
+    def _fill(self, key, loader, dumps):
+        self._count("misses")
+        value = loader()
+        if value is None:
+            return None
+        try:
+            data = dumps(value)
+            self.backend.set(key, data)
+            self._count("bytes_written", len(data))
+        except Exception as e:
+            self._count("errors")
+            print(f"❌ Shared cache write failed: {e}")
+        return value
+
+    def get(self, key, loader, dumps, loads):
+        """Value for `key`, calling `loader` only if no replica has cached it."""
+        if self.backend is None:
+            self._count("misses")
+            return loader()
+        key = self.digest(key)
+        value = self._read(key, loads)
+        if value is not None:
+            self._count("hits")
+            return value
+
+        with self.filling_lock:
+            done = self.filling.get(key)
+            if done is None:
+                self.filling[key] = threading.Event()
+        if done is not None:
+            # Another thread of this process is filling this key.
+            done.wait(self.lock_ttl)
+            value = self._read(key, loads)
+            if value is not None:
+                self._count("coalesced")
+                return value
+            return self._fill(key, loader, dumps)
+        try:
+            return self._fill_coalesced(key, loader, dumps, loads)
+        finally:
+            with self.filling_lock:
+                self.filling.pop(key).set()
+
+    def _fill_coalesced(self, key, loader, dumps, loads):
+        value = self._read(key, loads)
+        if value is not None:
+            self._count("coalesced")
+            return value
+        try:
+            owner = self.backend.acquire(key, self.lock_ttl)
+        except Exception as e:
+            self._count("errors")
+            print(f"❌ Shared cache lock failed: {e}")
+            return loader()
+        if owner:
+            try:
+                return self._fill(key, loader, dumps)
+            finally:
+                self.backend.release(key)
+
+        # Another replica is filling this key; wait for its result.
+        deadline = time.monotonic() + self.lock_ttl
+        while time.monotonic() < deadline:
+            time.sleep(POLL_SECONDS)
+            value = self._read(key, loads)
+            if value is not None:
+                self._count("coalesced")
+                return value
+            if self.backend.acquire(key, self.lock_ttl):
+                try:
+                    return self._fill(key, loader, dumps)
+                finally:
+                    self.backend.release(key)
+        return self._fill(key, loader, dumps)
+
+    def get_frame(self, key, loader):
+        return self.get(key, loader, dump_frame, load_frame)
+
+    def get_json(self, key, loader):
+        return self.get(key, loader, dump_json, load_json)
+
+    def get_text(self, key, loader):
+        return self.get(key, loader, dump_text, load_text)
+
+
+def make_backend(kind=SHARED_CACHE):
+    if kind == "none":
+        return None
+    try:
+        return BACKENDS[kind]()
+    except Exception as e:
+        print(f"❌ Shared cache backend '{kind}' unavailable, caching per process only: {e}")
+        return None
+
+
+shared_cache = SharedCache(make_backend())
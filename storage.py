@@ -0,0 +1,109 @@
+import os
+import shutil
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# === CONFIG ===
+CLEANED_PATH = os.getenv("CLEANED_PATH", "google_trends_cleaned.parquet")
+
+# Low-cardinality text columns are dictionary-encoded so each distinct
+# country/region/term is stored once per row group instead of once per row.
+_DICT = pa.dictionary(pa.int32(), pa.string())
+
+CLEANED_SCHEMA = pa.schema([
+    ("term", _DICT),
+    ("translate", _DICT),
+    ("country_name", _DICT),
+    ("region_name", _DICT),
+    ("region_name_cleaned", _DICT),
+    ("region_name_final", _DICT),
+    ("week", pa.date32()),
+    ("refresh_date", pa.date32()),
+    ("score", pa.float64()),
+    ("rank", pa.int16()),
+    ("country_code", _DICT),
+])
+
+# The dataset is partitioned on disk by country, so per-country reads only
+# touch that country's files.
+PARTITION_COLS = ["country_code"]
+
+# Partition keys are read back as plain strings. Rows with a null key live in
+# __HIVE_DEFAULT_PARTITION__, which pyarrow cannot unify with dictionary-typed
+# keys; they are dictionary-encoded again after the read.
+PARTITIONING = ds.partitioning(pa.schema([(c, pa.string()) for c in PARTITION_COLS]), flavor="hive")
+
+
+def to_arrow(df):
+    """Project a cleaned DataFrame onto CLEANED_SCHEMA."""
+    arrays = []
+    for field in CLEANED_SCHEMA:
+        col = df[field.name]
+        if pa.types.is_date32(field.type):
+            col = pd.to_datetime(col, errors="coerce").dt.date
+        arr = pa.array(col, from_pandas=True)
+        if pa.types.is_dictionary(field.type):
+            arr = arr.cast(pa.string()).dictionary_encode()
+        arrays.append(arr.cast(field.type))
+    return pa.Table.from_arrays(arrays, schema=CLEANED_SCHEMA)
+
+
+def write_cleaned(df, path=CLEANED_PATH):
+    """Write the cleaned dataset to `path`.
+
+    A `.csv` path keeps the old text output; anything else is written as a
+    Parquet dataset partitioned by country_code.
+    """
+    if path.endswith(".csv"):
+        df.to_csv(path, index=False)
+        return
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    pq.write_to_dataset(to_arrow(df), path, partition_cols=PARTITION_COLS)
+
+
+def read_cleaned(columns=None, path=CLEANED_PATH, filters=None):
+    """Read the cleaned dataset, loading only `columns`.
+
+    Parquet files are memory-mapped and dictionary columns come back as
+    pandas categoricals; `filters` (pyarrow DNF, e.g.
+    `[("country_code", "=", "DE")]`) prunes partitions before any data is read.
+    """
+    if path.endswith(".csv"):
+        dates = [c for c in ("week", "refresh_date") if columns is None or c in columns]
+        df = pd.read_csv(path, usecols=columns, parse_dates=dates)
+        if filters:
+            for col, op, value in filters:
+                df = df[df[col] == value] if op == "=" else df[df[col].isin(value)]
+        return df
+    table = pq.read_table(path, columns=columns, filters=filters, memory_map=True, partitioning=PARTITIONING)
+    for col in PARTITION_COLS:
+        if col in table.column_names:
+            i = table.column_names.index(col)
+            table = table.set_column(i, col, table.column(i).dictionary_encode())
+    return table.to_pandas(date_as_object=False)
+
+
+if __name__ == "__main__":
+    # Round-trip check: rows with a null partition key (e.g. Namibia's "NA",
+    # which read_csv parses as NaN) must survive a write and a full read.
+    import tempfile
+    sample = pd.DataFrame({
+        "term": ["a", "b", "c"], "translate": ["a", "b", "c"],
+        "country_name": ["Germany", "Namibia", "Germany"],
+        "region_name": ["Bavaria", "Khomas", "Berlin"],
+        "region_name_cleaned": ["Bavaria", "Khomas", "Berlin"],
+        "region_name_final": ["Bavaria", "Khomas", "Berlin"],
+        "week": pd.to_datetime(["2024-01-07"] * 3), "refresh_date": pd.to_datetime(["2024-01-14"] * 3),
+        "score": [100.0, 50.0, None], "rank": [1, 2, 3], "country_code": ["DE", None, "DE"],
+    })
+    path = os.path.join(tempfile.mkdtemp(), "cleaned.parquet")
+    write_cleaned(sample, path)
+    back = read_cleaned(path=path).sort_values("term", ignore_index=True)
+    assert len(back) == len(sample), back
+    assert back["country_code"].isna().tolist() == [False, True, False], back["country_code"]
+    assert isinstance(back["country_code"].dtype, pd.CategoricalDtype)
+    assert len(read_cleaned(path=path, filters=[("country_code", "=", "DE")])) == 2
+    print(f"✅ Round-tripped {len(back)} rows, including a null country_code.")
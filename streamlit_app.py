@@ -1,20 +1,13 @@
 # === APP CONFIG ===
+# Heavy dependencies (plotly, pycountry, wordcloud, the database layer) are
+# imported inside the page functions that use them, so the Home page and a
+# fresh replica only pay for streamlit itself. Track this with
+# `python -m benchmarks.bench_cold_start`.
 import streamlit as st
 import os
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from sqlalchemy import create_engine
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
-import pycountry
 import math
-import json
-import glob
-import unicodedata
-import re
-from difflib import get_close_matches
-from streamlit_plotly_events import plotly_events
+from geodata import country_regions, load_geojson, pick_tier
+from profiling import profiler, profiled, PROFILE_PANEL
 
 st.set_page_config(page_title="Interactive Trends Dashboard", layout="wide")
 
@@ -89,85 +82,133 @@ latin_script_countries = [
     'Denmark', 'Israel'
 ]
 
-# === DATABASE SETUP ===
-DB_USER = os.getenv('DB_USER')
-DB_PASS = os.getenv('DB_PASS')
-DB_HOST = os.getenv('DB_HOST')
-DB_PORT = os.getenv('DB_PORT')
-DB_NAME = os.getenv('DB_NAME')
-CSV_PATH = os.getenv('CSV_PATH')
-engine = create_engine(f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}")
-
-# === DATA LOADERS ===
-@st.cache_data
-def load_csv_data():
-    df = pd.read_csv(CSV_PATH)
-    term_groups = pd.read_csv("term_groups.csv")
-    merged = pd.merge(df, term_groups, how="left", on="translate")
-    merged['final_term'] = merged['normalized_term'].fillna(merged['translate'])
-    return merged
-
-@st.cache_data
-def get_postgres_data():
-    query = """
-    SELECT 
-        c.country_name,
-        c.country_code,
-        r.region_name,
-        r.region_name_final,
-        t.term,
-        t.translate,
-        tr.week,
-        tr.rank
-    FROM trends tr
-    JOIN countries c ON tr.country_code = c.country_code
-    JOIN regions r ON tr.region_name = r.region_name AND tr.country_code = r.country_code
-    JOIN terms t ON tr.term = t.term
-    WHERE tr.rank BETWEEN 1 AND 5
-    """
-    return pd.read_sql(query, engine)
-
+# Rows per page of the Latest Term Ranks table.
+RANKS_PAGE_SIZE = int(os.getenv('RANKS_PAGE_SIZE', '25'))
 
 # === HELPER FUNCTIONS ===
 def iso2_to_iso3(code):
+    import pycountry
     try:
         return pycountry.countries.get(alpha_2=code).alpha_3
     except:
         return None
 
-def normalize_str(s):
-    if pd.isna(s): return ""
-    s = str(s)
-    s = unicodedata.normalize('NFKD', s).encode('ASCII', 'ignore').decode('utf-8')
-    s = re.sub(r'\s+', '', s)
-    s = re.sub(r'[^\w]', '', s)
-    return s.lower()
+def escape_html(series):
+    return (
+        series.astype(str)
+        .str.replace("&", "&amp;", regex=False)
+        .str.replace("<", "&lt;", regex=False)
+        .str.replace(">", "&gt;", regex=False)
+        .str.replace('"', "&quot;", regex=False)
+        .str.replace("'", "&#x27;", regex=False)
+    )
+
+def rank_table_html(terms, ranks):
+    # Built column-wise in one pass; only the visible page is passed in.
+    pct = ((6 - ranks) / 5 * 100).clip(lower=0).astype(int).astype(str)
+    rows = (
+        "<tr><td style='white-space:nowrap;overflow:hidden;text-overflow:ellipsis;'>"
+        + escape_html(terms)
+        + "</td><td><div style='background:#333;border-radius:4px;height:8px;overflow:hidden;'>"
+        + "<div style='background:#1f77b4;width:" + pct + "%;height:100%;'></div></div></td></tr>"
+    )
+    return (
+        "<div class='scroll-panel'><table><thead><tr><th>Term</th><th>Popularity</th></tr></thead><tbody>"
+        + "".join(rows.tolist())
+        + "</tbody></table></div>"
+    )
 
+@profiled("region_list")
 @st.cache_data
-def load_csv_with_final():
-    df_clean = pd.read_csv(CSV_PATH, parse_dates=["week"])
-    return df_clean[["country_name","region_name","region_name_final"]].drop_duplicates()
+def load_region_list(iso3_code):
+    profiler.mark_miss()
+    # Served from the compact region index; no polygons are parsed here.
+    return [r["name"] for r in country_regions(iso3_code)]
 
+@profiled("geojson")
 @st.cache_data
 def load_geojson_for_country(iso3_code):
-    folder = "Country Regions"
-    pattern = f"gadm41_{iso3_code}_1.json"
-    matches = glob.glob(os.path.join(folder, pattern))
-    if not matches:
-        st.warning(f"No GeoJSON file matching {pattern}")
+    profiler.mark_miss()
+    # Smallest pre-simplified tier that still looks right at the map's size.
+    geojson = load_geojson(iso3_code, tier=pick_tier(iso3_code))
+    if geojson is None:
+        st.warning(f"No GeoJSON file matching gadm41_{iso3_code}_1.json")
         return None
-    with open(matches[0], "r", encoding="utf-8") as f:
-        return json.load(f)
+    for feat in geojson['features']:
+        feat['id'] = feat['properties']['NAME_1']
+    return geojson
 
-# === SIDEBAR MENU ===
-st.sidebar.header("Navigation")
-page = st.sidebar.radio(
-    "Select View:",
-    ["🏠 Home", "🌐 Global-Level Stats", "📍 Region & Country Level Stats"]
-)
+@profiled("region_map_spec")
+@st.cache_data
+def region_map_spec(iso3_code, country_id, data_version):
+    # Built once per country and data load, then kept as serialized JSON;
+    # region selection only adds a highlight trace on top of it.
+    # The JSON (GeoJSON included) is also shared with the other replicas.
+    # The metrics are fetched first: the loader must not use the shared cache.
+    from data_access import get_region_metrics
+    from shared_cache import shared_cache
+
+    profiler.mark_miss()
+
+    if not load_region_list(iso3_code):
+        return None
+    metrics = get_region_metrics(country_id)
+    return shared_cache.get_text(
+        ("region_map_spec", iso3_code, country_id, data_version),
+        lambda: build_region_map_spec(iso3_code, metrics),
+    )
+
+def build_region_map_spec(iso3_code, region_metrics):
+    import plotly.graph_objects as go
+
+    geojson = load_geojson_for_country(iso3_code)
+    if geojson is None:
+        return None
+    regions = load_region_list(iso3_code)
+    metrics = region_metrics.reindex(regions)
+    with profiler.span("build_choropleth") as span:
+        fig = go.Figure(go.Choropleth(
+            geojson=geojson,
+            featureidkey="properties.NAME_1",
+            locations=regions,
+            z=metrics['rank1_count'].fillna(0),
+            customdata=list(zip(
+                metrics['top_term'].fillna("–"),
+                metrics['mean_score'].round(1).fillna(0),
+                metrics['appearances'].fillna(0).astype(int),
+            )),
+            hovertemplate=(
+                "<b>%{location}</b><br>Top term: %{customdata[0]}<br>"
+                "Rank 1 appearances: %{z}<br>Mean score: %{customdata[1]}<br>"
+                "Top 5 appearances: %{customdata[2]}<extra></extra>"
+            ),
+            colorscale=[[0, "lightgrey"], [1, "steelblue"]],
+            colorbar_title="Rank 1",
+            marker_line_width=0.5,
+        ))
+        fig.update_geos(fitbounds="locations", visible=False)
+        spec = fig.to_json()
+        span.bytes = len(spec)
+    return spec
+
+def highlight_trace(fig, region):
+    import plotly.graph_objects as go
+
+    features = [f for f in fig.data[0].geojson['features'] if f['id'] == region]
+    return go.Choropleth(
+        geojson={"type": "FeatureCollection", "features": features},
+        featureidkey="properties.NAME_1",
+        locations=[region],
+        z=[1],
+        colorscale=[[0, "rgba(0,0,0,0)"], [1, "rgba(0,0,0,0)"]],
+        showscale=False,
+        marker_line_color="orange",
+        marker_line_width=3,
+        hoverinfo="skip",
+    )
 
 # === HOME PAGE ===
-if page == "🏠 Home":
+def render_home():
     st.markdown("""
     <div class="home-container">
         <div class="home-title">🌍 Google Trends International Dashboard 🌍</div>
@@ -180,31 +221,21 @@ if page == "🏠 Home":
     """, unsafe_allow_html=True)
 
 # === GLOBAL-LEVEL PAGE ===
-elif page == "🌐 Global-Level Stats":
+def render_global():
+    import plotly.express as px
+    import plotly.graph_objects as go
+    from data_access import get_top_rank1_terms, get_popular_terms, get_term_popularity, fetch_concurrently
+
     st.title("🌐 Global-Level Stats")
-    df_global = load_csv_data()
 
     # Frequent Rank 1 Terms Bar Chart
     st.header("🏆 Most Frequent Rank 1 Terms by Country")
-    rank1_df = df_global[df_global['rank'] == 1]
-    term_counts = (
-        rank1_df
-        .groupby(['country_name', 'translate'])
-        .size()
-        .reset_index(name='count')
-    )
-    max_counts = term_counts.groupby('country_name')['count'].transform('max')
-    common_terms = term_counts[term_counts['count'] == max_counts]
-    grouped = (
-        common_terms
-        .groupby('country_name')['translate']
-        .apply(lambda x: ', '.join(sorted(x)))
-        .reset_index()
-    )
-    counts = common_terms.groupby('country_name')['count'].first().reset_index()
-    final_df = grouped.merge(counts, on='country_name').rename(
-        columns={'translate': 'top_terms', 'count': 'count'}
-    )
+    # Both sections' base queries are independent; run them side by side.
+    page_data = fetch_concurrently({
+        "top_rank1_terms": get_top_rank1_terms,
+        "popular_terms": get_popular_terms,
+    })
+    final_df = page_data["top_rank1_terms"]
     df_sorted = final_df.sort_values('count', ascending=False).reset_index(drop=True)
 
     chunk_size = 6
@@ -216,78 +247,81 @@ elif page == "🌐 Global-Level Stats":
     )
     chunk = df_sorted.iloc[(page_num - 1) * chunk_size: page_num * chunk_size]
 
-    fig = go.Figure()
-    fig.add_trace(
-        go.Bar(
-            x=chunk['count'],
-            y=chunk['country_name'],
-            orientation='h',
-            text=chunk['top_terms'],
-            hoverinfo='text+x+y',
-            marker_color='teal'
+    with profiler.span("render.rank1_chart"):
+        fig = go.Figure()
+        fig.add_trace(
+            go.Bar(
+                x=chunk['count'],
+                y=chunk['country_name'],
+                orientation='h',
+                text=chunk['top_terms'],
+                hoverinfo='text+x+y',
+                marker_color='teal'
+            )
         )
-    )
-    fig.update_layout(
-        title=f"Most Frequent Rank 1 Terms - Page {page_num}",
-        xaxis_title="Frequency",
-        yaxis_title="Country",
-        height=500
-    )
-    st.plotly_chart(fig)
+        fig.update_layout(
+            title=f"Most Frequent Rank 1 Terms - Page {page_num}",
+            xaxis_title="Frequency",
+            yaxis_title="Country",
+            height=500
+        )
+        st.plotly_chart(fig)
 
     # Term Popularity Across Countries
     st.header("📊 Term Popularity Across Countries")
-    available_terms = sorted(df_global['final_term'].dropna().unique())
+    available_terms = page_data["popular_terms"]
     selected_term = st.selectbox(
         "Choose a term to see where it was popular:",
         available_terms
     )
-    term_df = df_global[df_global['final_term'] == selected_term]
-    term_country_counts = (
-        term_df
-        .groupby('country_name')
-        .size()
-        .reset_index(name='count')
-    )
-    if not term_country_counts.empty:
-        fig2 = px.bar(
-            term_country_counts.sort_values('count', ascending=True),
-            x='count',
-            y='country_name',
-            orientation='h',
-            title=f"📈 Countries where '{selected_term}' was a Top Search"
-        )
-        st.plotly_chart(fig2)
-    else:
-        st.warning("No data found for the selected term.")
+    term_country_counts = get_term_popularity(selected_term)
+    with profiler.span("render.term_popularity"):
+        if not term_country_counts.empty:
+            fig2 = px.bar(
+                term_country_counts.sort_values('count', ascending=True),
+                x='count',
+                y='country_name',
+                orientation='h',
+                title=f"📈 Countries where '{selected_term}' was a Top Search"
+            )
+            st.plotly_chart(fig2)
+        else:
+            st.warning("No data found for the selected term.")
 
 # === REGION-&-COUNTRY-LEVEL PAGE ===
-elif page == "📍 Region & Country Level Stats":
-
+def render_region():
+    import plotly.io as pio
+    from data_access import (
+        get_countries, get_country_weeks, get_country_data, get_crosswalk, get_region_metrics,
+        get_data_version, fetch_concurrently,
+    )
+    from wordclouds import wordcloud_png
 
-    df = get_postgres_data()
-    countries = sorted(df['country_name'].unique())
-    selected_country = st.sidebar.selectbox("Select a Country", countries)
-    weeks = sorted(df['week'].unique())
+    countries = get_countries()
+    selected_country = st.sidebar.selectbox("Select a Country", countries['country_name'])
+    country = countries[countries['country_name'] == selected_country].iloc[0]
+    weeks = get_country_weeks(int(country['country_id']))
     sel_weeks = st.sidebar.multiselect("Select Weeks:", weeks, default=weeks)
     translate_toggle = st.sidebar.checkbox("Show Translated Terms", value=True)
     term_col = 'translate' if translate_toggle else 'term'
-    df_country = df[(df['country_name'] == selected_country) & (df['week'].isin(sel_weeks))]
-
-    csv_map = load_csv_with_final().rename(columns={"region_name_final": "region_name_final_mapped"})
-    df_country = df_country.merge(csv_map, on=["country_name", "region_name"], how="left")
-    df_country["region_name_final"] = df_country["region_name_final_mapped"]
-
 
-    iso3 = iso2_to_iso3(df_country['country_code'].iloc[0])
-    geojson = load_geojson_for_country(iso3)
-    if geojson is None:
+    iso3 = iso2_to_iso3(country['country_code'])
+    regions = load_region_list(iso3)
+    if not regions:
+        st.warning(f"No GeoJSON file matching gadm41_{iso3}_1.json")
         st.stop()
 
-    for feat in geojson['features']:
-        feat['id'] = feat['properties']['NAME_1']
-    regions = [f['id'] for f in geojson['features']]
-    region_lookup = {normalize_str(r): r for r in regions}
+    # Independent queries run side by side; the region metrics warm the
+    # frame cache for region_map_spec below.
+    country_id = int(country['country_id'])
+    page_data = fetch_concurrently({
+        "country_data": lambda: get_country_data(country_id, sel_weeks),
+        "crosswalk": lambda: get_crosswalk(country['country_code']),
+        "region_metrics": lambda: get_region_metrics(country_id),
+    })
+    # Shared across sessions; derive new frames instead of mutating it.
+    df_country = page_data["country_data"]
+    crosswalk = page_data["crosswalk"]
 
     st.title(f"📍 Region & Country Level Stats for {selected_country}")
     st.subheader("🗺️ Select a Region (or leave All) to Filter Results")
@@ -295,93 +329,82 @@ elif page == "📍 Region & Country Level Stats":
     # 3) region selector
     region_sel = st.selectbox("Pick a Region:", ["All Regions"] + regions)
 
-    # === Normalize and Match Region for Data and Map Separately ===
+    unmatched = crosswalk[crosswalk['geo_name'].isna()]
+    if not unmatched.empty:
+        with st.expander(f"⚠️ {len(unmatched)} dataset region(s) without a map region"):
+            st.dataframe(
+                unmatched[['region_name', 'region_name_final', 'confidence', 'method']],
+                hide_index=True, use_container_width=True
+            )
+
+    # === Look Up the Region Through the ETL's Crosswalk ===
     if region_sel == "All Regions":
         df_slice = df_country.copy()
         selected_geojson_region = None
     else:
-        norm_region_sel = normalize_str(region_sel)
-        df_country["region_name_norm"] = df_country["region_name_final"].apply(normalize_str)
-
-        # Step 1: Try to match user input with GeoJSON name (for map highlight)
-        norm_geojson_names = {normalize_str(r): r for r in regions}
-        selected_geojson_region = norm_geojson_names.get(norm_region_sel, None)
-
-        # Step 2: Try to match with data
-        df_slice = df_country[df_country["region_name_norm"] == norm_region_sel]
+        selected_geojson_region = region_sel
+        df_slice = df_country[df_country["geo_name"] == region_sel]
 
         if df_slice.empty:
-            # Try fuzzy match for data only
-            choices = df_country["region_name_norm"].dropna().unique().tolist()
-            matches = get_close_matches(norm_region_sel, choices, n=1, cutoff=0.8)
-            if matches:
-                fallback_norm = matches[0]
-                fallback_row = df_country[df_country["region_name_norm"] == fallback_norm].iloc[0]
-                fallback_display = fallback_row["region_name_final"]
-                st.warning(f"⚠️ No exact data for '{region_sel}', using '{fallback_display}' for data...")
-
-                df_slice = df_country[df_country["region_name_norm"] == fallback_norm]
-
-                # Re-lookup correct GeoJSON name using original input region (not fallback)
-                selected_geojson_region = norm_geojson_names.get(normalize_str(region_sel), None)
-            else:
-                st.warning(f"⚠️ No data for '{region_sel}', showing all regions...")
-                df_slice = df_country.copy()
-                selected_geojson_region = None
-                region_sel = "All Regions"
+            st.warning(f"⚠️ No data for '{region_sel}', showing all regions...")
+            df_slice = df_country.copy()
+            selected_geojson_region = None
+            region_sel = "All Regions"
+        else:
+            mapped = crosswalk[crosswalk['geo_name'] == region_sel]
+            fuzzy = mapped[mapped['method'] == 'fuzzy']
+            if not fuzzy.empty:
+                sources = ", ".join(f"'{r}'" for r in fuzzy['region_name_final'].unique())
+                if (mapped['method'] == 'exact').any():
+                    st.caption(f"Data for '{region_sel}' also includes {sources}.")
+                else:
+                    st.warning(f"⚠️ No exact data for '{region_sel}', using {sources} for data...")
 
     title_suffix = "" if region_sel == "All Regions" else f" – {region_sel}"
 
 
     # Map
-    plot_df = pd.DataFrame({
-        "region_name_final": regions,
-        "value": [
-            1 if (selected_geojson_region is None or r == selected_geojson_region) else 0.1
-            for r in regions
-        ]
-    })
-
-    fig = px.choropleth(
-        plot_df,
-        geojson=geojson,
-        featureidkey="properties.NAME_1",
-        locations="region_name_final",
-        color="value",
-        color_continuous_scale=["lightgrey", "steelblue"],
-        title=f"{selected_country}{title_suffix}"
-    )
-    fig.update_geos(fitbounds="locations", visible=False)
-    fig.update_traces(marker_line_width=0.5)
-    st.plotly_chart(fig, use_container_width=True)
+    spec = region_map_spec(iso3, country_id, get_data_version())
+    if spec is None:
+        st.stop()
+    with profiler.span("render.map") as span:
+        fig = pio.from_json(spec)
+        if selected_geojson_region is not None:
+            fig.add_trace(highlight_trace(fig, selected_geojson_region))
+        fig.update_layout(title=f"{selected_country}{title_suffix}")
+        st.plotly_chart(fig, use_container_width=True)
+        span.bytes = len(spec)
 
 
     # Metrics & Word Cloud
     left, right = st.columns([1,1])
     with left:
-        st.subheader("📊 Key Metrics")
-        m1, m2, m3 = st.columns(3)
-        m1.metric("Unique Rank 1 Terms", df_slice[df_slice['rank'] == 1][term_col].nunique())
-        m2.metric("Total Ranked Terms", df_slice[term_col].nunique())
-        region_count = 1 if region_sel != "All Regions" else df_country["region_name_final"].nunique()
-        m3.metric("Regions Selected", region_count)
-        freq = df_slice[term_col].value_counts()
-        if not freq.empty:
-            top, cnt = freq.index[0], freq.iloc[0]
-            st.subheader("🔁 Most Frequent Term")
-            st.metric(label="Term", value=top, delta=f"Appeared {cnt} times")
+        with profiler.span("render.metrics"):
+            st.subheader("📊 Key Metrics")
+            m1, m2, m3 = st.columns(3)
+            m1.metric("Unique Rank 1 Terms", df_slice[df_slice['rank'] == 1][term_col].nunique())
+            m2.metric("Total Ranked Terms", df_slice[term_col].nunique())
+            region_count = 1 if region_sel != "All Regions" else df_country["region_name_final"].nunique()
+            m3.metric("Regions Selected", region_count)
+            freq = df_slice[term_col].value_counts()
+            if not freq.empty:
+                top, cnt = freq.index[0], freq.iloc[0]
+                st.subheader("🔁 Most Frequent Term")
+                st.metric(label="Term", value=top, delta=f"Appeared {cnt} times")
     with right:
         st.subheader("☁️ Word Cloud")
         wc_col = term_col if selected_country in latin_script_countries else 'translate'
-        text = " ".join(df_slice[wc_col].dropna().astype(str))
-        if text:
-            wc = WordCloud(width=400, height=200, background_color='white').generate(text)
-            plt.figure(figsize=(6,3))
-            plt.imshow(wc, interpolation='bilinear')
-            plt.axis("off")
-            st.pyplot(plt)
-        else:
-            st.write("No terms for word cloud.")
+        with profiler.span("render.wordcloud", cached=True) as span:
+            png = wordcloud_png(
+                selected_country, region_sel, sel_weeks, wc_col,
+                lambda: " ".join(df_slice[wc_col].dropna().astype(str)),
+                get_data_version(),
+            )
+            if png:
+                st.image(png, use_container_width=True)
+            else:
+                st.write("No terms for word cloud.")
+            span.bytes = len(png or b"")
 
     # Latest Term Ranks
     st.subheader("📋 Latest Term Ranks")
@@ -390,14 +413,68 @@ elif page == "📍 Region & Country Level Stats":
         .sort_values(['rank','week'], ascending=[True,False])
         .drop_duplicates(term_col)[[term_col,'rank']]
     )
-    html = "<div class='scroll-panel'><table><thead><tr><th>Term</th><th>Popularity</th></tr></thead><tbody>"
-    for _, row in latest.iterrows():
-        t, r = row[term_col], int(row['rank'])
-        pct = int((6 - r) / 5 * 100)
-        html += (
-            f"<tr><td style='white-space:nowrap;overflow:hidden;text-overflow:ellipsis;'>{t}</td>"
-            f"<td><div style='background:#333;border-radius:4px;height:8px;overflow:hidden;'>"
-            f"<div style='background:#1f77b4;width:{pct}%;height:100%;'></div></div></td></tr>"
+    num_rank_pages = max(1, math.ceil(len(latest) / RANKS_PAGE_SIZE))
+    rank_page = 1
+    if num_rank_pages > 1:
+        rank_page = st.selectbox(
+            "Ranks Page",
+            range(1, num_rank_pages + 1),
+            format_func=lambda x: f"Page {x} of {num_rank_pages}"
         )
-    html += "</tbody></table></div>"
-    st.markdown(html, unsafe_allow_html=True)
+    visible = latest.iloc[(rank_page - 1) * RANKS_PAGE_SIZE: rank_page * RANKS_PAGE_SIZE]
+    with profiler.span("render.rank_table") as span:
+        html = rank_table_html(visible[term_col], visible['rank'])
+        st.markdown(html, unsafe_allow_html=True)
+        span.rows, span.bytes = len(visible), len(html)
+
+
+# === PROFILING PANEL ===
+def render_profile_panel():
+    # Opt-in with PROFILE_PANEL=1; the numbers cover every session of this replica.
+    if not PROFILE_PANEL or not st.sidebar.checkbox("🛠️ Show profiling", value=False):
+        return
+    import pandas as pd
+    from data_access import memory_report_line, pool_report
+
+    st.sidebar.subheader("🛠️ Profiling")
+    st.sidebar.caption(memory_report_line())
+    report = pd.DataFrame(profiler.report())
+    if report.empty:
+        st.sidebar.write("No timings recorded yet.")
+    else:
+        st.sidebar.dataframe(
+            report.sort_values("p95_ms", ascending=False)[
+                ["name", "calls", "p50_ms", "p95_ms", "hit_rate", "rows_p50", "bytes_p50"]
+            ],
+            hide_index=True, use_container_width=True,
+        )
+
+    # Database queries that missed every cache: latency and time spent waiting for a connection.
+    pool = pool_report()
+    st.sidebar.caption(
+        f"DB pool: {pool['checked_out']} of {pool['pool_size']} connections in use, "
+        f"{pool['overflow']} overflow"
+    )
+    queries = pd.DataFrame.from_dict(pool["queries"], orient="index")
+    if not queries.empty:
+        st.sidebar.dataframe(
+            queries.rename_axis("query").reset_index().sort_values("latency_p95_ms", ascending=False)[
+                ["query", "count", "errors", "latency_p50_ms", "latency_p95_ms", "pool_wait_p50_ms", "pool_wait_p95_ms"]
+            ],
+            hide_index=True, use_container_width=True,
+        )
+
+# === SIDEBAR MENU ===
+PAGES = {
+    "🏠 Home": render_home,
+    "🌐 Global-Level Stats": render_global,
+    "📍 Region & Country Level Stats": render_region,
+}
+st.sidebar.header("Navigation")
+page = st.sidebar.radio("Select View:", list(PAGES))
+try:
+    with profiler.span(f"page.{PAGES[page].__name__[len('render_'):]}", "page"):
+        PAGES[page]()
+finally:
+    # Also shown when a page ends early with st.stop().
+    render_profile_panel()
@@ -0,0 +1,262 @@
+import os
+import re
+import zlib
+import argparse
+import numpy as np
+import pandas as pd
+
+# === CONFIG ===
+TERM_GROUPS_PATH = os.getenv("TERM_GROUPS_PATH", "term_groups.csv")
+TERM_INDEX_PATH  = os.getenv("TERM_INDEX_PATH", "term_index.npz")
+GROUP_THRESHOLD  = float(os.getenv("GROUP_THRESHOLD", "0.75"))  # cosine similarity to join a group
+N_FEATURES       = int(os.getenv("TERM_FEATURES", "512"))
+NGRAM_SIZE       = 3
+BLOCK_ROWS       = 2048  # rows per similarity block, bounding peak memory
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+# === FEATURES ===
+def normalize_term(term):
+    return WHITESPACE_PATTERN.sub(" ", str(term).strip().lower())
+
+
+def char_ngrams(term, n=NGRAM_SIZE):
+    padded = f" {normalize_term(term)} "
+    return [padded[i:i + n] for i in range(max(1, len(padded) - n + 1))]
+
+
+def term_features(terms, n_features=N_FEATURES):
+    """L2-normalized hashed character n-gram counts, one row per term.
+
+    n-grams are hashed with crc32, which (unlike hash()) is stable across
+    processes, so vectors stored in the index stay comparable.
+    """
+    rows, cols = [], []
+    hashes = {}
+    for i, term in enumerate(terms):
+        for gram in char_ngrams(term):
+            col = hashes.get(gram)
+            if col is None:
+                col = hashes[gram] = zlib.crc32(gram.encode("utf-8")) % n_features
+            rows.append(i)
+            cols.append(col)
+    features = np.zeros((len(terms), n_features), dtype=np.float32)
+    np.add.at(features, (np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)), 1.0)
+    norms = np.linalg.norm(features, axis=1, keepdims=True)
+    return features / np.where(norms == 0, 1, norms)
+
+
+def _unit(rows):
+    norms = np.linalg.norm(rows, axis=1, keepdims=True)
+    return rows / np.where(norms == 0, 1, norms)
+
+
+def connected_groups(features, threshold=GROUP_THRESHOLD, block_rows=BLOCK_ROWS):
+    """Component id per row, linking rows whose cosine similarity is >= threshold.
+
+    Similarities are computed block by block, so memory stays at
+    block_rows x len(features) rather than the full square matrix.
+    """
+    parent = np.arange(len(features))
+
+    def find(i):
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        while parent[i] != root:
+            parent[i], i = root, parent[i]
+        return root
+
+    for start in range(0, len(features), block_rows):
+        sims = features[start:start + block_rows] @ features.T
+        rows, cols = np.nonzero(sims >= threshold)
+        for i, j in zip(rows + start, cols):
+            if i < j:
+                ri, rj = find(i), find(j)
+                if ri != rj:
+                    parent[max(ri, rj)] = min(ri, rj)
+    return np.array([find(i) for i in range(len(features))])
+
+
+def group_label(terms, features):
+    """Member closest to the group's centroid; ties go to the alphabetically first."""
+    sims = features @ _unit(features.sum(axis=0, keepdims=True)).T
+    best = np.flatnonzero(np.isclose(sims[:, 0], sims.max()))
+    return min(terms[i] for i in best)
+
+
+# === NEAREST-NEIGHBOR INDEX ===
+class TermIndex:
+    """Persistent nearest-neighbor index over every grouped term.
+
+    Holds one feature vector per known term plus its group label (mirroring
+    term_groups.csv). A new term joins the group of its most similar known
+    term if that similarity reaches the threshold, the same single-linkage
+    rule a full recluster uses.
+    """
+
+    def __init__(self, terms=(), labels=(), vectors=None, n_features=N_FEATURES):
+        self.n_features = n_features
+        self.terms = dict(zip(terms, labels))
+        self.vectors = vectors if vectors is not None else np.zeros((0, n_features), dtype=np.float32)
+        self.known_labels = set(self.terms.values())
+
+    @classmethod
+    def from_groups(cls, groups, n_features=N_FEATURES):
+        """Index seeded from a translate -> normalized_term table, keeping its groups."""
+        groups = groups.dropna(subset=["translate"]).drop_duplicates("translate")
+        labels = groups["normalized_term"].fillna(groups["translate"])
+        return cls(groups["translate"].tolist(), labels.tolist(),
+                   term_features(groups["translate"].tolist(), n_features), n_features)
+
+    @classmethod
+    def load(cls, path=TERM_INDEX_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["terms"].tolist(), data["labels"].tolist(), data["vectors"], int(data["n_features"]))
+
+    def save(self, path=TERM_INDEX_PATH):
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            terms=np.array(list(self.terms), dtype=str),
+            labels=np.array(list(self.terms.values()), dtype=str),
+            vectors=self.vectors.astype(np.float32),
+            n_features=np.array(self.n_features),
+        )
+        os.replace(tmp_path, path)
+
+    def nearest(self, features, block_rows=BLOCK_ROWS):
+        """(row of the most similar known term, similarity) for each feature row."""
+        best = np.zeros(len(features), dtype=np.int64)
+        best_sim = np.full(len(features), -1.0, dtype=np.float32)
+        for start in range(0, len(self.vectors), block_rows):
+            sims = features @ self.vectors[start:start + block_rows].T
+            idx = sims.argmax(axis=1)
+            sim = sims[np.arange(len(features)), idx]
+            better = sim > best_sim
+            best[better], best_sim[better] = idx[better] + start, sim[better]
+        return best, best_sim
+
+    def assign(self, new_terms, threshold=GROUP_THRESHOLD):
+        """Group terms not seen before; returns {term: label} for just those terms.
+
+        Work is proportional to the number of new terms: each is compared with
+        the known terms' vectors, and the ones that match nothing are
+        clustered among themselves into new groups.
+        """
+        unseen = [t for t in dict.fromkeys(new_terms) if pd.notna(t) and t not in self.terms]
+        if not unseen:
+            return {}
+        features = term_features(unseen, self.n_features)
+        known_labels = list(self.terms.values())
+        assigned = {}
+        matched = np.zeros(len(unseen), dtype=bool)
+        if len(self.vectors):
+            best, best_sim = self.nearest(features)
+            matched = best_sim >= threshold
+            for i in np.flatnonzero(matched):
+                assigned[unseen[i]] = known_labels[best[i]]
+
+        rest = np.flatnonzero(~matched)
+        if len(rest):
+            components = connected_groups(features[rest], threshold)
+            for component in np.unique(components):
+                members = rest[components == component]
+                member_terms = [unseen[i] for i in members]
+                label = group_label(member_terms, features[members])
+                assigned.update({term: label for term in member_terms})
+
+        self.terms.update({t: assigned[t] for t in unseen})
+        self.vectors = np.vstack([self.vectors, features])
+        self.known_labels.update(assigned.values())
+        return assigned
+
+    @property
+    def groups(self):
+        return len(self.known_labels)
+
+    def to_frame(self):
+        return pd.DataFrame({"translate": list(self.terms), "normalized_term": list(self.terms.values())})
+
+
+def recluster(terms, threshold=GROUP_THRESHOLD, n_features=N_FEATURES):
+    """Group every term from scratch: connected components of the similarity graph."""
+    terms = sorted({t for t in terms if pd.notna(t)})
+    features = term_features(terms, n_features)
+    components = connected_groups(features, threshold)
+    labels = {}
+    for component in np.unique(components):
+        members = np.flatnonzero(components == component)
+        labels[component] = group_label([terms[i] for i in members], features[members])
+    groups = pd.DataFrame({"translate": terms, "normalized_term": [labels[c] for c in components]})
+    return TermIndex.from_groups(groups, n_features)
+
+
+# === PIPELINE STAGE ===
+def load_index(groups_path=TERM_GROUPS_PATH, index_path=TERM_INDEX_PATH):
+    """The stored index, re-seeded from term_groups.csv if that file is newer or the settings changed."""
+    if os.path.exists(index_path) and (
+        not os.path.exists(groups_path) or os.path.getmtime(index_path) >= os.path.getmtime(groups_path)
+    ):
+        index = TermIndex.load(index_path)
+        if index.n_features == N_FEATURES:
+            return index
+    if os.path.exists(groups_path):
+        return TermIndex.from_groups(pd.read_csv(groups_path))
+    return TermIndex()
+
+
+def line_terminator(path, default="\n"):
+    """The line ending `path` already uses, so rewrites do not churn the whole file."""
+    try:
+        with open(path, "rb") as f:
+            first = f.readline()
+    except OSError:
+        return default
+    return "\r\n" if first.endswith(b"\r\n") else default
+
+
+def save_groups(index, groups_path=TERM_GROUPS_PATH, index_path=TERM_INDEX_PATH):
+    tmp_path = f"{groups_path}.tmp"
+    index.to_frame().to_csv(tmp_path, index=False, lineterminator=line_terminator(groups_path))
+    os.replace(tmp_path, groups_path)
+    index.save(index_path)
+
+
+def update_term_groups(terms, groups_path=TERM_GROUPS_PATH, index_path=TERM_INDEX_PATH):
+    """Assign unseen `terms` to groups, persist them, and return the full mapping.
+
+    Existing assignments never change, so term_groups.csv only grows.
+    """
+    index = load_index(groups_path, index_path)
+    assigned = index.assign(pd.Series(terms).dropna().unique().tolist())
+    if assigned:
+        save_groups(index, groups_path, index_path)
+    elif not os.path.exists(index_path):
+        # First run with nothing new: build the index, leave term_groups.csv untouched.
+        index.save(index_path)
+    if assigned:
+        print(f"✅ Grouped {len(assigned)} new terms ({len(set(assigned.values()))} groups); "
+              f"{len(index.terms)} terms in '{groups_path}'.")
+    return index.to_frame()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Regenerate term_groups.csv.")
+    parser.add_argument("--recluster", action="store_true",
+                        help="regroup every known term from scratch instead of only new ones")
+    parser.add_argument("--source", help="cleaned dataset whose translate column to include")
+    args = parser.parse_args()
+
+    terms = []
+    if args.source:
+        from storage import read_cleaned
+        terms = read_cleaned(["translate"], args.source)["translate"].dropna().unique().tolist()
+    if args.recluster:
+        known = list(load_index().terms)
+        index = recluster(known + terms)
+        save_groups(index)
+        print(f"✅ Reclustered {len(index.terms)} terms into {index.groups} groups.")
+    else:
+        update_term_groups(terms)
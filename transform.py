@@ -1,29 +1,42 @@
+import numpy as np
 import pandas as pd
 import re
 import os
-import json
 from datetime import datetime
-from difflib import SequenceMatcher
-
-def validate_dates(df, columns):
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pandas.tseries.api import guess_datetime_format
+from matcher import match_regions, MATCH_WORKERS
+from storage import write_cleaned, CLEANED_PATH
+from term_grouping import update_term_groups
+from metrics import pipeline_metrics
+
+# === CONFIG ===
+# Processes cleaning per-country partitions in clean_data; 1 keeps it serial, 0 uses every core.
+TRANSFORM_WORKERS = int(os.getenv("TRANSFORM_WORKERS", "1")) or os.cpu_count()
+DATE_COLUMNS = ['week', 'refresh_date']
+# Columns clean_chunk replaces or adds; all a partition worker sends back.
+CLEANED_COLUMNS = DATE_COLUMNS + ['region_name_cleaned', 'region_name_final']
+
+@pipeline_metrics.timed("validate_dates")
+def validate_dates(df, columns, formats=None):
+    formats = formats or {}
     for col in columns:
-        df[col] = pd.to_datetime(df[col], errors='coerce')
-    return df
-
-def clean_region_names(df):
-    admin_words = [
-        "County", "Province", "State of", "State", "Governorate",
-        "Region", "Special Region", "District", "City", "Prefecture", "Oblast"
-    ]
-    admin_pattern = re.compile(r'\b(?:' + '|'.join(re.escape(w) for w in admin_words) + r')\b', re.IGNORECASE)
-    df["region_name_cleaned"] = df["region_name"].apply(
-        lambda x: re.sub(r"\\s+", "", admin_pattern.sub("", x)) if isinstance(x, str) else x
-    )
+        df[col] = pd.to_datetime(df[col], errors='coerce', format=formats.get(col))
     return df
 
-def apply_manual_fixes(df):
-    # === Step 2: Manual corrections (region_fix_map) ===
-    region_fix_map = {
+# === Region cleaning ===
+# Region names repeat across every term and week, so each step below cleans
+# the distinct values once and broadcasts the result back to the rows.
+ADMIN_WORDS = [
+    "County", "Province", "State of", "State", "Governorate",
+    "Region", "Special Region", "District", "City", "Prefecture", "Oblast"
+]
+ADMIN_PATTERN = re.compile(r'\b(?:' + '|'.join(re.escape(w) for w in ADMIN_WORDS) + r')\b', re.IGNORECASE)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# === Manual corrections (region_fix_map) ===
+REGION_FIX_MAP = {
     "AutonomousofBuenosAires": "BuenosAires",
     "Federal": "DistritoFederal",
     "YukonTerritory": "Yukon",
@@ -334,50 +347,79 @@ def apply_manual_fixes(df):
 
 }
 
-    df["region_name_final"] = df["region_name_cleaned"].apply(
-        lambda x: region_fix_map.get(x, x)
-    )
-    df["region_name_final"] = df["region_name_final"].str.replace(r"\s+", "", regex=True)
-    return df
+def map_unique(series, func):
+    """Apply `func` to each distinct non-null value of `series` and broadcast back.
 
-def perform_fuzzy_matching(df):
-    iso3_mapping = {
-        "Argentina": "ARG", "Australia": "AUS", "Austria": "AUT", "Belgium": "BEL", "Brazil": "BRA",
-        "Canada": "CAN", "Chile": "CHL", "Colombia": "COL", "Czech Republic": "CZE", "Denmark": "DNK",
-        "Egypt": "EGY", "Finland": "FIN", "France": "FRA", "Germany": "DEU", "Hungary": "HUN",
-        "India": "IND", "Indonesia": "IDN", "Israel": "ISR", "Italy": "ITA", "Japan": "JPN",
-        "Malaysia": "MYS", "Mexico": "MEX", "Netherlands": "NLD", "New Zealand": "NZL",
-        "Nigeria": "NGA", "Norway": "NOR", "Philippines": "PHL", "Poland": "POL", "Portugal": "PRT",
-        "Romania": "ROU", "Saudi Arabia": "SAU", "South Africa": "ZAF", "South Korea": "KOR",
-        "Spain": "ESP", "Sweden": "SWE", "Switzerland": "CHE", "Taiwan": "TWN", "Thailand": "THA",
-        "Turkey": "TUR", "Ukraine": "UKR", "United Kingdom": "GBR", "Vietnam": "VNM"
-    }
-    def get_best_match(name, choices):
-        best_match = max(choices, key=lambda x: SequenceMatcher(None, name, x).ratio())
-        score = SequenceMatcher(None, name, best_match).ratio()
-        return best_match, score
+    Missing values are passed through untouched, matching `Series.apply`
+    with a function that returns non-strings as-is.
+    """
+    codes, uniques = pd.factorize(series)
+    values = np.empty(len(uniques) + 1, dtype=object)
+    values[:-1] = [func(v) for v in uniques]
+    values[-1] = np.nan
+    result = pd.Series(values[codes], index=series.index)
+    return result.where(codes != -1, series)
 
-    poor_matches = []
-    for country, iso3 in iso3_mapping.items():
-        json_path = f"Downloads/Country_Regions/gadm41_{iso3}_1.json"
-        if not os.path.exists(json_path):
-            continue
+def _strip_admin_words(name):
+    return re.sub(r"\\s+", "", ADMIN_PATTERN.sub("", name)) if isinstance(name, str) else name
+
+def _fix_region_name(name):
+    fixed = REGION_FIX_MAP.get(name, name)
+    return WHITESPACE_PATTERN.sub("", fixed) if isinstance(fixed, str) else fixed
+
+@pipeline_metrics.timed("clean_region_names")
+def clean_region_names(df):
+    df["region_name_cleaned"] = map_unique(df["region_name"], _strip_admin_words)
+    return df
+
+@pipeline_metrics.timed("apply_manual_fixes")
+def apply_manual_fixes(df):
+    df["region_name_final"] = map_unique(df["region_name_cleaned"], _fix_region_name)
+    return df
 
-        with open(json_path, "r", encoding="utf-8") as f:
-            geojson_data = json.load(f)
+ISO3_MAPPING = {
+    "Argentina": "ARG", "Australia": "AUS", "Austria": "AUT", "Belgium": "BEL", "Brazil": "BRA",
+    "Canada": "CAN", "Chile": "CHL", "Colombia": "COL", "Czech Republic": "CZE", "Denmark": "DNK",
+    "Egypt": "EGY", "Finland": "FIN", "France": "FRA", "Germany": "DEU", "Hungary": "HUN",
+    "India": "IND", "Indonesia": "IDN", "Israel": "ISR", "Italy": "ITA", "Japan": "JPN",
+    "Malaysia": "MYS", "Mexico": "MEX", "Netherlands": "NLD", "New Zealand": "NZL",
+    "Nigeria": "NGA", "Norway": "NOR", "Philippines": "PHL", "Poland": "POL", "Portugal": "PRT",
+    "Romania": "ROU", "Saudi Arabia": "SAU", "South Africa": "ZAF", "South Korea": "KOR",
+    "Spain": "ESP", "Sweden": "SWE", "Switzerland": "CHE", "Taiwan": "TWN", "Thailand": "THA",
+    "Turkey": "TUR", "Ukraine": "UKR", "United Kingdom": "GBR", "Vietnam": "VNM"
+}
 
-        geojson_regions = sorted(
-            feature["properties"]["NAME_1"].replace(" ", "") for feature in geojson_data["features"]
-        )
+# ISO 3166-1 alpha-2 code of every country in the dataset.
+COUNTRY_REFERENCE = pd.DataFrame({
+    'country_name': ['Brazil', 'Belgium', 'India', 'Japan', 'United Kingdom', 'Indonesia',
+                     'Thailand', 'Norway', 'South Korea', 'Italy', 'Malaysia', 'Portugal',
+                     'Netherlands', 'Poland', 'Vietnam', 'Mexico', 'Nigeria', 'South Africa',
+                     'Austria', 'Chile', 'Finland', 'Philippines', 'Canada', 'Spain', 'Germany',
+                     'Colombia', 'Argentina', 'Taiwan', 'Czech Republic', 'New Zealand', 'France',
+                     'Switzerland', 'Ukraine', 'Australia', 'Sweden', 'Saudi Arabia', 'Turkey',
+                     'Egypt', 'Romania', 'Hungary', 'Denmark', 'Israel'],
+    'country_code': ['BR', 'BE', 'IN', 'JP', 'GB', 'ID', 'TH', 'NO', 'KR', 'IT', 'MY', 'PT', 'NL', 'PL',
+                     'VN', 'MX', 'NG', 'ZA', 'AT', 'CL', 'FI', 'PH', 'CA', 'ES', 'DE', 'CO', 'AR', 'TW',
+                     'CZ', 'NZ', 'FR', 'CH', 'UA', 'AU', 'SE', 'SA', 'TR', 'EG', 'RO', 'HU', 'DK', 'IL']
+})
+
+@pipeline_metrics.timed("fuzzy_matching")
+def perform_fuzzy_matching(df, workers=MATCH_WORKERS):
+    pairs = df[["country_name", "region_name_final"]].dropna().drop_duplicates()
+    regions_by_iso3 = {
+        ISO3_MAPPING[country]: sorted(group["region_name_final"])
+        for country, group in pairs.groupby("country_name")
+        if country in ISO3_MAPPING
+    }
+    iso3_to_country = {iso3: country for country, iso3 in ISO3_MAPPING.items()}
+    matches = match_regions(regions_by_iso3, workers=workers)
 
-        country_regions = df[df["country_name"] == country]["region_name_final"].dropna().unique()
-        for region in sorted(country_regions):
-            if region is None:
-                continue
-            best_match, score = get_best_match(region, geojson_regions)
+    poor_matches = []
+    for iso3, region_matches in matches.items():
+        for region, (best_match, score) in sorted(region_matches.items()):
             if score < 0.80:
                 poor_matches.append({
-                    "country": country,
+                    "country": iso3_to_country[iso3],
                     "region_in_dataset": region,
                     "geojson_best_match": best_match,
                     "similarity_score": round(score, 3)
@@ -390,15 +432,100 @@ def perform_fuzzy_matching(df):
     else:
         print("No poor matches found or 'country' column missing.")
         
-def clean_data(df):
-    df = validate_dates(df, ['week', 'refresh_date'])
+def clean_chunk(df, date_formats=None):
+    # Row-local cleaning steps only; safe to run on any slice of the raw CSV.
+    df = validate_dates(df, DATE_COLUMNS, date_formats)
     df = clean_region_names(df)
     df = apply_manual_fixes(df)
+    return df
+
+# === Parallel cleaning ===
+def infer_date_formats(df, columns):
+    """The format pandas would infer for each whole column, so every partition parses alike.
+
+    pandas guesses from the first non-null string; when that fails it parses
+    each value on its own, which format="mixed" reproduces.
+    """
+    formats = {}
+    for col in columns:
+        values = df[col].dropna()
+        if len(values) and isinstance(values.iloc[0], str):
+            formats[col] = guess_datetime_format(values.iloc[0]) or "mixed"
+    return formats
+
+def _align_date_units(parts, columns):
+    # An all-NaT partition comes back at seconds resolution; give it the unit the others parsed to.
+    for col in columns:
+        units = {
+            np.datetime_data(part[col].dtype)[0]
+            for part in parts if pd.api.types.is_datetime64_dtype(part[col]) and part[col].notna().any()
+        }
+        if not units:
+            continue
+        dtype = f"datetime64[{max(units, key=['s', 'ms', 'us', 'ns'].index)}]"
+        for part in parts:
+            if pd.api.types.is_datetime64_dtype(part[col]) and part[col].dtype != dtype:
+                part[col] = part[col].astype(dtype)
+
+# The frame being partitioned, set before the pool forks so workers inherit
+# it instead of receiving pickled copies of their rows.
+_partition_source = None
+
+def _clean_partition(job):
+    """Cleaned columns of one partition, with the stage records made cleaning it."""
+    positions, date_formats, part = job
+    if part is None:
+        part = _partition_source.iloc[positions]
+    recorded = len(pipeline_metrics.stages)
+    cleaned = clean_chunk(part, date_formats)[CLEANED_COLUMNS]
+    return cleaned, pipeline_metrics.stages[recorded:]
+
+@pipeline_metrics.timed("clean_partitions")
+def clean_chunk_parallel(df, workers=TRANSFORM_WORKERS):
+    """clean_chunk run on per-country_code partitions in a process pool.
+
+    Every cleaning step is independent per country, so each partition is
+    cleaned on its own and the rows are put back in their original order;
+    the result equals clean_chunk(df), index and dtypes included. Like
+    clean_chunk, it updates `df` in place and returns it.
+    """
+    global _partition_source
+    partitions = df.groupby("country_code", sort=False, dropna=False).indices
+    if workers <= 1 or len(partitions) <= 1:
+        return clean_chunk(df)
+    date_formats = infer_date_formats(df, DATE_COLUMNS)
+    # Largest countries first, so no worker picks up a big one at the very end.
+    positions = sorted(partitions.values(), key=len, reverse=True)
+    fork = "fork" in multiprocessing.get_all_start_methods()
+    jobs = [(p, date_formats, None if fork else df.iloc[p]) for p in positions]
+    _partition_source = df if fork else None
+    try:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(jobs)),
+            mp_context=multiprocessing.get_context("fork") if fork else None,
+        ) as pool:
+            results = list(pool.map(_clean_partition, jobs))
+    finally:
+        _partition_source = None
+    parts = [cleaned for cleaned, _ in results]
+    # The per-step stages ran in the workers; report them like a serial run.
+    pipeline_metrics.merge([record for _, records in results for record in records])
+    _align_date_units(parts, DATE_COLUMNS)
+    cleaned = pd.concat(parts).iloc[np.argsort(np.concatenate(positions), kind="stable")]
+    for col in CLEANED_COLUMNS:
+        df[col] = cleaned[col]
+    return df
+
+def clean_data(df, workers=TRANSFORM_WORKERS):
+    df = clean_chunk_parallel(df, workers) if workers > 1 else clean_chunk(df)
     perform_fuzzy_matching(df)
     return df
 
 if __name__ == "__main__":
-    df = pd.read_csv("actualDataTeamProject.csv")
+    pipeline_metrics.start("transform")
+    with pipeline_metrics.stage("read") as stage:
+        df = pd.read_csv("actualDataTeamProject.csv")
+        stage.rows_out = len(df)
     df = clean_data(df)
 
     print("NaN values per column:\n", df.isna().sum())
@@ -414,24 +541,18 @@ if __name__ == "__main__":
     print(date_validation)
 
     # Country name/code mismatches
-    country_reference = pd.DataFrame({
-        'country_name': ['Brazil', 'Belgium', 'India', 'Japan', 'United Kingdom', 'Indonesia',
-                         'Thailand', 'Norway', 'South Korea', 'Italy', 'Malaysia', 'Portugal',
-                         'Netherlands', 'Poland', 'Vietnam', 'Mexico', 'Nigeria', 'South Africa',
-                         'Austria', 'Chile', 'Finland', 'Philippines', 'Canada', 'Spain', 'Germany',
-                         'Colombia', 'Argentina', 'Taiwan', 'Czech Republic', 'New Zealand', 'France',
-                         'Switzerland', 'Ukraine', 'Australia', 'Sweden', 'Saudi Arabia', 'Turkey',
-                         'Egypt', 'Romania', 'Hungary', 'Denmark', 'Israel'],
-        'country_code': ['BR', 'BE', 'IN', 'JP', 'GB', 'ID', 'TH', 'NO', 'KR', 'IT', 'MY', 'PT', 'NL', 'PL',
-                         'VN', 'MX', 'NG', 'ZA', 'AT', 'CL', 'FI', 'PH', 'CA', 'ES', 'DE', 'CO', 'AR', 'TW',
-                         'CZ', 'NZ', 'FR', 'CH', 'UA', 'AU', 'SE', 'SA', 'TR', 'EG', 'RO', 'HU', 'DK', 'IL']
-    })
-    merged = df.merge(country_reference, on='country_name', how='left', suffixes=('', '_ref'))
+    merged = df.merge(COUNTRY_REFERENCE, on='country_name', how='left', suffixes=('', '_ref'))
     mismatches = merged[merged['country_code'] != merged['country_code_ref']]
     print("Mismatched rows:")
     print(mismatches[['country_name', 'country_code', 'country_code_ref']])
 
-    df.to_csv("google_trends_cleaned.csv", index=False)
-    print("Data cleaned and saved to google_trends_cleaned.csv")
+    with pipeline_metrics.stage("write_cleaned", len(df)):
+        write_cleaned(df, CLEANED_PATH)
+    print(f"Data cleaned and saved to {CLEANED_PATH}")
+
+    # Group any translated terms not yet in term_groups.csv.
+    with pipeline_metrics.stage("term_grouping", len(df)):
+        update_term_groups(df["translate"])
+    pipeline_metrics.write_report()
 
 
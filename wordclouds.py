@@ -0,0 +1,153 @@
+import io
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+from wordcloud import WordCloud
+
+from profiling import profiler
+
+# === CONFIG ===
+WORDCLOUD_CACHE_DIR   = os.getenv("WORDCLOUD_CACHE_DIR", "wordcloud_cache")
+WORDCLOUD_CACHE_ITEMS = int(os.getenv("WORDCLOUD_CACHE_ITEMS", "128"))
+WORDCLOUD_DISK_ITEMS  = int(os.getenv("WORDCLOUD_DISK_ITEMS", "2000"))
+WORDCLOUD_WIDTH       = 400
+WORDCLOUD_HEIGHT      = 200
+
+# Region value used for a country's whole-country view.
+ALL_REGIONS = "All Regions"
+
+
+def render_png(text):
+    """PNG bytes of a word cloud for `text`, or None when it has no plottable words.
+
+    No matplotlib figure is involved.
+    """
+    try:
+        wc = WordCloud(width=WORDCLOUD_WIDTH, height=WORDCLOUD_HEIGHT, background_color='white').generate(text)
+    except ValueError:
+        # Raised when stopword filtering leaves no words to plot.
+        return None
+    buffer = io.BytesIO()
+    wc.to_image().save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def cache_key(country, region, weeks, term_col, version=""):
+    """Stable file-name-safe key for one word-cloud view of one data load."""
+    spec = [country, region, sorted(str(w) for w in weeks), term_col, version]
+    return hashlib.sha1(json.dumps(spec, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class PngCache:
+    """LRU of rendered PNG bytes in memory, backed by a directory on disk.
+
+    The disk tier survives restarts and is shared by every process using
+    the same directory; it is pruned to `disk_items` by last use.
+    """
+
+    def __init__(self, directory=WORDCLOUD_CACHE_DIR, max_items=WORDCLOUD_CACHE_ITEMS,
+                 disk_items=WORDCLOUD_DISK_ITEMS):
+        self.directory = directory
+        self.max_items = max_items
+        self.disk_items = disk_items
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.png")
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                png = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        self._remember(key, png)
+        return png
+
+    def put(self, key, png):
+        self._remember(key, png)
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(png)
+        os.replace(tmp_path, path)
+        self._prune_disk()
+
+    def _remember(self, key, png):
+        with self.lock:
+            self.entries[key] = png
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_items:
+                self.entries.popitem(last=False)
+
+    def _prune_disk(self):
+        files = [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory) if name.endswith(".png")
+        ]
+        if len(files) <= self.disk_items:
+            return
+        files.sort(key=lambda path: os.path.getmtime(path))
+        for path in files[:len(files) - self.disk_items]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+png_cache = PngCache()
+
+
+def wordcloud_png(country, region, weeks, term_col, text_fn, version=""):
+    """Cached word-cloud PNG for a view, or None when it has no terms.
+
+    `text_fn` builds the input text and is only called on a cache miss.
+    Views without plottable terms are cached as empty bytes.
+    """
+    key = cache_key(country, region, weeks, term_col, version)
+    png = png_cache.get(key)
+    if png is None:
+        profiler.mark_miss()
+        text = text_fn()
+        png = (render_png(text) if text else None) or b""
+        png_cache.put(key, png)
+    return png or None
+
+
+# === PRE-RENDERING ===
+def prerender_default_views(term_col="translate"):
+    """Render every country's default Region page view: all regions, all weeks.
+
+    Meant to run right after an ETL load, so the first visitor of each
+    country page gets a cached image.
+    """
+    from data_access import get_countries, get_country_weeks, get_country_data, get_data_version
+
+    version = get_data_version()
+    countries = get_countries()
+    rendered = 0
+    for country in countries.itertuples(index=False):
+        weeks = get_country_weeks(int(country.country_id))
+        df = get_country_data(int(country.country_id), weeks, columns=(term_col,))
+        wordcloud_png(
+            country.country_name, ALL_REGIONS, weeks, term_col,
+            lambda: " ".join(df[term_col].dropna().astype(str)),
+            version,
+        )
+        rendered += 1
+    print(f"✅ Pre-rendered default word clouds for {rendered} countries into '{WORDCLOUD_CACHE_DIR}'.")
+
+
+if __name__ == "__main__":
+    prerender_default_views()